@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+import json
 import structlog
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any, Optional
 
 from app.database.database import get_db
 from app.database.models import User
@@ -12,9 +14,16 @@ from app.core.borgmatic import borgmatic
 logger = structlog.get_logger()
 router = APIRouter()
 
+# Pydantic models
+class BatchInfoRequest(BaseModel):
+    repository: str
+    archive_ids: List[str] = Field(..., min_length=1, max_length=100)
+
 @router.get("/list")
 async def list_archives(
     repository: str,
+    offset: int = Query(0, ge=0, description="Number of archives to skip"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of archives to return"),
     current_user: User = Depends(get_current_user)
 ):
     """List archives in a repository"""
@@ -26,8 +35,18 @@ async def list_archives(
                 detail=f"Failed to list archives: {result['stderr']}"
             )
         
-        return {"archives": result["stdout"]}
-    except Exception as e:
+        if offset == 0 and limit is None:
+            return {"archives": result["stdout"]}
+        
+        # Paginate the archives of each repository in the JSON output
+        repositories = json.loads(result["stdout"])
+        for repo in repositories:
+            archives = repo.get("archives", [])
+            repo["total_archives"] = len(archives)
+            repo["archives"] = archives[offset:offset + limit if limit else None]
+        
+        return {"archives": repositories, "offset": offset, "limit": limit}
+    except ValueError as e:
         logger.error("Failed to list archives", error=str(e))
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -41,45 +60,79 @@ async def get_archive_info(
     current_user: User = Depends(get_current_user)
 ):
     """Get information about a specific archive"""
-    try:
-        result = await borgmatic.info_archive(repository, archive_id)
-        if not result["success"]:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to get archive info: {result['stderr']}"
-            )
-        
-        return {"info": result["stdout"]}
-    except Exception as e:
-        logger.error("Failed to get archive info", error=str(e))
+    result = await borgmatic.info_archive(repository, archive_id)
+    if not result["success"]:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to get archive info"
+            detail=f"Failed to get archive info: {result['stderr']}"
         )
+    
+    return {"info": result["stdout"]}
+
+@router.post("/batch-info")
+async def get_archives_info(
+    batch_request: BatchInfoRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Get information about several archives in one request"""
+    results = await borgmatic.info_archives(batch_request.repository, batch_request.archive_ids)
+    
+    infos = []
+    for archive_id, result in zip(batch_request.archive_ids, results):
+        if result["success"]:
+            infos.append({"archive": archive_id, "success": True, "info": result["stdout"]})
+        else:
+            infos.append({"archive": archive_id, "success": False, "error": result["stderr"]})
+    
+    return {"infos": infos}
 
 @router.get("/{archive_id}/contents")
 async def get_archive_contents(
     repository: str,
     archive_id: str,
     path: str = "",
+    offset: int = Query(0, ge=0, description="Number of entries to skip"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of entries to return"),
     current_user: User = Depends(get_current_user)
 ):
-    """Get contents of an archive"""
+    """Stream contents of an archive as newline-delimited JSON"""
+    lines = borgmatic.stream_archive_contents(repository, archive_id, path, offset, limit)
+    
+    # Start borgmatic and wait for the first line before committing to a 200, so
+    # a bad archive, a missing repository or a spawn failure is a normal error
     try:
-        result = await borgmatic.list_archive_contents(repository, archive_id, path)
-        if not result["success"]:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to get archive contents: {result['stderr']}"
-            )
-        
-        return {"contents": result["stdout"]}
-    except Exception as e:
+        first_line = await lines.__anext__()
+    except StopAsyncIteration:
+        first_line = None
+    except (RuntimeError, OSError) as e:
         logger.error("Failed to get archive contents", error=str(e))
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to get archive contents"
+            detail=f"Failed to get archive contents: {str(e)}"
         )
+    
+    return StreamingResponse(_ndjson_lines(first_line, lines), media_type="application/x-ndjson")
+
+async def _ndjson_lines(first_line: Optional[bytes], lines: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Encode each output line as a JSON string on its own line, ending with an
+    {"error": ...} record if the listing fails part-way through"""
+    if first_line is None:
+        return
+    
+    try:
+        yield _ndjson_line(first_line)
+        async for line in lines:
+            yield _ndjson_line(line)
+    except RuntimeError as e:
+        logger.error("Archive contents listing failed mid-stream", error=str(e))
+        yield json.dumps({"error": f"Failed to get archive contents: {str(e)}"}).encode() + b"\n"
+    finally:
+        # Stops borgmatic right away if the client went away mid-stream
+        await lines.aclose()
+
+def _ndjson_line(line: bytes) -> bytes:
+    """One output line as a JSON string record"""
+    return json.dumps(line.decode(errors="replace").rstrip("\n")).encode() + b"\n"
 
 @router.delete("/{archive_id}")
 async def delete_archive(
@@ -88,18 +141,11 @@ async def delete_archive(
     current_user: User = Depends(get_current_user)
 ):
     """Delete an archive"""
-    try:
-        result = await borgmatic.delete_archive(repository, archive_id)
-        if not result["success"]:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to delete archive: {result['stderr']}"
-            )
-        
-        return {"message": "Archive deleted successfully"}
-    except Exception as e:
-        logger.error("Failed to delete archive", error=str(e))
+    result = await borgmatic.delete_archive(repository, archive_id)
+    if not result["success"]:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to delete archive"
-        ) 
\ No newline at end of file
+            detail=f"Failed to delete archive: {result['stderr']}"
+        )
+    
+    return {"message": "Archive deleted successfully"} 
\ No newline at end of file
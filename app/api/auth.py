@@ -1,15 +1,17 @@
 from datetime import timedelta, datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from sqlalchemy import and_, exists, func, or_, update
+from sqlalchemy.orm import Session, aliased
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
 import structlog
 
 from app.database.database import get_db
 from app.database.models import User
 from app.core.security import (
     authenticate_user, create_access_token, get_current_user, 
-    get_current_admin_user, create_user, update_user_password
+    get_current_admin_user, create_user, update_user_password, invalidate_user_cache
 )
 from app.config import settings
 
@@ -25,36 +27,37 @@ class Token(BaseModel):
 class UserCreate(BaseModel):
     username: str
     password: str
-    email: str = None
+    email: Optional[str] = None
     is_admin: bool = False
 
 class UserUpdate(BaseModel):
-    email: str = None
-    is_active: bool = None
-    is_admin: bool = None
+    email: Optional[str] = None
+    is_active: Optional[bool] = None
+    is_admin: Optional[bool] = None
 
 class PasswordChange(BaseModel):
     current_password: str
     new_password: str
 
 class UserResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     username: str
-    email: str = None
+    email: Optional[str] = None
     is_active: bool
     is_admin: bool
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
+# Handlers that use the synchronous Session are declared with plain ``def`` so
+# FastAPI runs them in its threadpool instead of blocking the event loop.
 @router.post("/login", response_model=Token)
-async def login(
+def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
     """Authenticate user and return access token"""
-    user = await authenticate_user(db, form_data.username, form_data.password)
+    user = authenticate_user(db, form_data.username, form_data.password)
     if not user:
         logger.warning("Failed login attempt", username=form_data.username)
         raise HTTPException(
@@ -89,8 +92,20 @@ async def logout(current_user: User = Depends(get_current_user)):
     return {"message": "Successfully logged out"}
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
     """Get current user information"""
+    updated_at = current_user.updated_at or current_user.created_at
+    version = int(updated_at.timestamp() * 1_000_000) if updated_at else 0
+    etag = f'W/"{current_user.id}-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=30"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    response.headers.update(headers)
     return current_user
 
 @router.post("/refresh", response_model=Token)
@@ -108,37 +123,52 @@ async def refresh_token(current_user: User = Depends(get_current_user)):
     }
 
 @router.get("/users", response_model=list[UserResponse])
-async def get_users(
+def get_users(
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
-    """Get all users (admin only)"""
-    users = db.query(User).all()
+    """Get users page by page (admin only)"""
+    # Cheap aggregate that changes whenever a user is added, removed or modified
+    max_id, count, last_updated = db.query(
+        func.max(User.id), func.count(User.id), func.max(User.updated_at)
+    ).one()
+    version = int(last_updated.timestamp() * 1_000_000) if last_updated else 0
+    etag = f'W/"users-{max_id}-{count}-{version}-{offset}-{limit}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    response.headers["ETag"] = etag
+    users = db.query(User).order_by(User.id).offset(offset).limit(limit).all()
     return users
 
 @router.post("/users", response_model=UserResponse)
-async def create_new_user(
+def create_new_user(
     user_data: UserCreate,
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """Create a new user (admin only)"""
-    # Check if username already exists
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
-    if existing_user:
+    # Check if username or email (if provided) already exists in one round trip
+    conflicts = db.query(User.username, User.email).filter(
+        or_(
+            User.username == user_data.username,
+            and_(User.email.isnot(None), User.email == user_data.email)
+        )
+    ).all()
+    if any(row.username == user_data.username for row in conflicts):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
-    
-    # Check if email already exists (if provided)
-    if user_data.email:
-        existing_email = db.query(User).filter(User.email == user_data.email).first()
-        if existing_email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
-            )
+    if user_data.email and any(row.email == user_data.email for row in conflicts):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     
     user = create_user(
         db=db,
@@ -152,49 +182,55 @@ async def create_new_user(
     return user
 
 @router.put("/users/{user_id}", response_model=UserResponse)
-async def update_user(
+def update_user(
     user_id: int,
     user_data: UserUpdate,
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """Update user information (admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
+    # Update fields if provided
+    values = {k: v for k, v in user_data.model_dump().items() if v is not None}
+    if not values:
+        user = db.get(User, user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        return user
+    
+    stmt = update(User).where(User.id == user_id)
+    if "email" in values:
+        # Only update if the email isn't already taken by another user
+        other = aliased(User)
+        stmt = stmt.where(
+            ~exists().where(other.email == values["email"], other.id != user_id)
         )
+    user = db.execute(stmt.values(**values).returning(User)).scalar_one_or_none()
     
-    # Update fields if provided
-    if user_data.email is not None:
-        # Check if email is already taken by another user
-        if user_data.email != user.email:
-            existing_email = db.query(User).filter(
-                User.email == user_data.email,
-                User.id != user_id
-            ).first()
-            if existing_email:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Email already registered"
-                )
-        user.email = user_data.email
-    
-    if user_data.is_active is not None:
-        user.is_active = user_data.is_active
-    
-    if user_data.is_admin is not None:
-        user.is_admin = user_data.is_admin
+    if user is None:
+        db.rollback()
+        if db.get(User, user_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     
+    # Serialize before commit so expiring the instance doesn't trigger a reload
+    response = UserResponse.model_validate(user)
     db.commit()
-    db.refresh(user)
+    invalidate_user_cache(user_id)
     
     logger.info("User updated", user_id=user_id, updated_by=current_user.username)
-    return user
+    return response
 
 @router.delete("/users/{user_id}")
-async def delete_user(
+def delete_user(
     user_id: int,
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
@@ -206,7 +242,7 @@ async def delete_user(
             detail="Cannot delete yourself"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -215,12 +251,13 @@ async def delete_user(
     
     db.delete(user)
     db.commit()
+    invalidate_user_cache(user_id)
     
     logger.info("User deleted", user_id=user_id, deleted_by=current_user.username)
     return {"message": "User deleted successfully"}
 
 @router.post("/change-password")
-async def change_password(
+def change_password(
     password_data: PasswordChange,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
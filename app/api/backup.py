@@ -1,22 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import update
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+import asyncio
 import structlog
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-from app.database.database import get_db
+from app.database.database import get_db, SessionLocal
 from app.database.models import User, BackupJob
 from app.core.security import get_current_user
-from app.core.borgmatic import borgmatic
+from app.core.borgmatic import borgmatic, borgmatic_cache
 from app.api.events import event_manager
 
 logger = structlog.get_logger()
 router = APIRouter()
 
+# Running backup tasks by job id, so they can be cancelled and aren't garbage collected
+_backup_tasks: Dict[int, asyncio.Task] = {}
+
 # Pydantic models
 class BackupRequest(BaseModel):
-    repository: str = None
-    config_file: str = None
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    repository: Optional[str] = None
+    config_file: Optional[str] = None
 
 class BackupResponse(BaseModel):
     job_id: int
@@ -41,7 +50,7 @@ async def start_backup(
         db.refresh(backup_job)
         
         # Send initial progress update
-        await event_manager.broadcast_event(
+        event_manager.broadcast_event_nowait(
             "backup_progress",
             {
                 "job_id": str(backup_job.id),
@@ -52,6 +61,31 @@ async def start_backup(
             str(current_user.id)
         )
         
+        # Run the backup outside the request; progress is delivered via SSE
+        task = asyncio.create_task(
+            _run_backup_job(backup_job.id, backup_request, str(current_user.id), current_user.username)
+        )
+        _backup_tasks[backup_job.id] = task
+        task.add_done_callback(lambda _, job_id=backup_job.id: _backup_tasks.pop(job_id, None))
+        
+        logger.info("Backup started", job_id=backup_job.id, user=current_user.username)
+        
+        return BackupResponse(
+            job_id=backup_job.id,
+            status=backup_job.status,
+            message="Backup started"
+        )
+    except SQLAlchemyError as e:
+        logger.error("Failed to start backup", error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to start backup"
+        )
+
+async def _run_backup_job(job_id: int, backup_request: BackupRequest, user_id: str, username: str):
+    """Execute a backup job and record its outcome"""
+    db = SessionLocal()
+    try:
         # Get repository passphrase if repository is specified
         passphrase = None
         if backup_request.repository:
@@ -66,55 +100,67 @@ async def start_backup(
             passphrase=passphrase
         )
         
+        # A new archive changes repository status
+        borgmatic_cache.invalidate()
+        
         # Update job status
         if result["success"]:
-            backup_job.status = "completed"
-            backup_job.progress = 100
-            backup_job.logs = result["stdout"]
-            
+            outcome = {"status": "completed", "progress": 100, "logs": result["stdout"]}
+        else:
+            outcome = {"status": "failed", "error_message": result["stderr"], "logs": result["stdout"]}
+        
+        # Only a job that is still running is updated, so a cancellation (possibly
+        # made through another worker process) is never overwritten
+        updated = await asyncio.to_thread(_record_backup_outcome, db, job_id, outcome)
+        if not updated:
+            logger.info("Backup finished after being cancelled", job_id=job_id, user=username)
+            return
+        
+        if result["success"]:
             # Send completion update
-            await event_manager.broadcast_event(
+            event_manager.broadcast_event_nowait(
                 "backup_progress",
                 {
-                    "job_id": str(backup_job.id),
+                    "job_id": str(job_id),
                     "progress": 100,
                     "status": "completed",
                     "message": "Backup completed successfully"
                 },
-                str(current_user.id)
+                user_id
             )
         else:
-            backup_job.status = "failed"
-            backup_job.error_message = result["stderr"]
-            backup_job.logs = result["stdout"]
-            
             # Send failure update
-            await event_manager.broadcast_event(
+            event_manager.broadcast_event_nowait(
                 "backup_progress",
                 {
-                    "job_id": str(backup_job.id),
+                    "job_id": str(job_id),
                     "progress": 0,
                     "status": "failed",
                     "message": f"Backup failed: {result['stderr']}"
                 },
-                str(current_user.id)
+                user_id
             )
         
-        db.commit()
-        
-        logger.info("Backup completed", job_id=backup_job.id, user=current_user.username)
-        
-        return BackupResponse(
-            job_id=backup_job.id,
-            status=backup_job.status,
-            message="Backup completed successfully" if result["success"] else "Backup failed"
-        )
+        logger.info("Backup completed", job_id=job_id, user=username, success=result["success"])
+    except asyncio.CancelledError:
+        # cancel_backup has already recorded the cancellation; borgmatic was stopped
+        logger.info("Backup task cancelled", job_id=job_id, user=username)
+        raise
     except Exception as e:
-        logger.error("Failed to start backup", error=str(e))
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to start backup"
-        )
+        logger.error("Backup job failed", job_id=job_id, error=str(e))
+        db.rollback()
+    finally:
+        db.close()
+
+def _record_backup_outcome(db: Session, job_id: int, outcome: Dict[str, Any]) -> bool:
+    """Store a finished backup's outcome unless the job is no longer running"""
+    result = db.execute(
+        update(BackupJob)
+        .where(BackupJob.id == job_id, BackupJob.status == "running")
+        .values(**outcome)
+    )
+    db.commit()
+    return result.rowcount > 0
 
 @router.get("/status/{job_id}")
 async def get_backup_status(
@@ -124,7 +170,16 @@ async def get_backup_status(
 ):
     """Get backup job status"""
     try:
-        job = db.query(BackupJob).filter(BackupJob.id == job_id).first()
+        # Project only the status columns; logs are served by /logs/{job_id}
+        job = db.query(
+            BackupJob.id,
+            BackupJob.repository,
+            BackupJob.status,
+            BackupJob.started_at,
+            BackupJob.completed_at,
+            BackupJob.progress,
+            BackupJob.error_message
+        ).filter(BackupJob.id == job_id).first()
         if not job:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -138,10 +193,9 @@ async def get_backup_status(
             "started_at": job.started_at.isoformat() if job.started_at else None,
             "completed_at": job.completed_at.isoformat() if job.completed_at else None,
             "progress": job.progress,
-            "error_message": job.error_message,
-            "logs": job.logs
+            "error_message": job.error_message
         }
-    except Exception as e:
+    except SQLAlchemyError as e:
         logger.error("Failed to get backup status", error=str(e))
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -172,9 +226,14 @@ async def cancel_backup(
         job.status = "cancelled"
         db.commit()
         
+        # Stop borgmatic if the backup runs in this process
+        task = _backup_tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+        
         logger.info("Backup cancelled", job_id=job_id, user=current_user.username)
         return {"message": "Backup cancelled successfully"}
-    except Exception as e:
+    except SQLAlchemyError as e:
         logger.error("Failed to cancel backup", error=str(e))
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -189,19 +248,23 @@ async def get_backup_logs(
 ):
     """Get backup job logs"""
     try:
-        job = db.query(BackupJob).filter(BackupJob.id == job_id).first()
+        job = db.query(
+            BackupJob.id,
+            BackupJob.logs,
+            BackupJob.error_message
+        ).filter(BackupJob.id == job_id).first()
         if not job:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Backup job not found"
             )
         
-        return {
+        return ORJSONResponse({
             "job_id": job.id,
             "logs": job.logs or "",
             "error_message": job.error_message or ""
-        }
-    except Exception as e:
+        })
+    except SQLAlchemyError as e:
         logger.error("Failed to get backup logs", error=str(e))
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
-import yaml
+from pydantic import BaseModel, ConfigDict
+import asyncio
+import hashlib
+import orjson
+import os
+import tempfile
 import structlog
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
 from app.database.database import get_db
 from app.database.models import User
 from app.core.security import get_current_user, get_current_admin_user
-from app.core.borgmatic import borgmatic
+from app.core.borgmatic import borgmatic, borgmatic_cache
 from app.config import settings
 
 logger = structlog.get_logger()
@@ -29,38 +35,93 @@ class ConfigTemplate(BaseModel):
     content: str
 
 class ConfigBackupResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
-    description: str = None
+    description: Optional[str] = None
     created_at: str
 
-    class Config:
-        from_attributes = True
+# Static configuration templates, built and encoded once at import
+_TEMPLATES: Tuple[ConfigTemplate, ...] = (
+    ConfigTemplate(
+        name="basic",
+        description="Basic backup configuration",
+        content="""repositories:
+  - path: /path/to/repository
+    label: my-backup
+
+storage:
+  compression: lz4
+  encryption: repokey
+
+retention:
+  keep_daily: 7
+  keep_weekly: 4
+  keep_monthly: 6
+
+consistency:
+  checks:
+    - repository
+    - archives
+  check_last: 3"""
+    ),
+    ConfigTemplate(
+        name="encrypted",
+        description="Encrypted backup configuration",
+        content="""repositories:
+  - path: /path/to/encrypted/repository
+    label: encrypted-backup
+
+storage:
+  compression: zstd
+  encryption: repokey-blake2
+
+retention:
+  keep_daily: 7
+  keep_weekly: 4
+  keep_monthly: 12
+  keep_yearly: 3
+
+consistency:
+  checks:
+    - repository
+    - archives
+  check_last: 3"""
+    ),
+    ConfigTemplate(
+        name="minimal",
+        description="Minimal backup configuration",
+        content="""repositories:
+  - path: /path/to/repository
+
+storage:
+  compression: lz4
+
+retention:
+  keep_daily: 7"""
+    )
+)
+_TEMPLATES_JSON = jsonable_encoder(_TEMPLATES)
+_TEMPLATES_ETAG = '"' + hashlib.sha256(orjson.dumps(_TEMPLATES_JSON)).hexdigest()[:32] + '"'
 
 @router.get("/current")
 async def get_current_config(
     current_user: User = Depends(get_current_user)
 ):
     """Get current borgmatic configuration"""
-    try:
-        config_info = await borgmatic.get_config_info()
-        if not config_info["success"]:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=config_info.get("error", "Configuration not found")
-            )
-        
-        return {
-            "content": yaml.dump(config_info["config"], default_flow_style=False),
-            "config_path": config_info["config_path"],
-            "parsed": config_info["config"]
-        }
-    except Exception as e:
-        logger.error("Failed to get current config", error=str(e))
+    config_info = await borgmatic.get_config_info()
+    if not config_info["success"]:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to get configuration"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=config_info.get("error", "Configuration not found")
         )
+    
+    return {
+        "content": config_info["content"],
+        "config_path": config_info["config_path"],
+        "parsed": config_info["config"]
+    }
 
 @router.put("/update")
 async def update_config(
@@ -77,106 +138,57 @@ async def update_config(
                 detail=f"Invalid configuration: {validation['error']}"
             )
         
-        # Write configuration file
+        # Write configuration file off the event loop
         config_path = settings.borgmatic_config_path
-        with open(config_path, 'w') as f:
-            f.write(config_data.content)
+        await asyncio.to_thread(_write_config_file, config_path, config_data.content)
+        borgmatic.invalidate_config_cache(config_path)
+        borgmatic_cache.invalidate()
         
         logger.info("Configuration updated", user=current_user.username)
         return {"message": "Configuration updated successfully"}
-    except Exception as e:
+    except OSError as e:
         logger.error("Failed to update config", error=str(e))
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update configuration"
         )
 
+def _write_config_file(config_path: str, content: str):
+    """Atomically replace the configuration file with new content"""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(config_path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        if os.path.exists(config_path):
+            os.chmod(temp_path, os.stat(config_path).st_mode & 0o777)
+        os.replace(temp_path, config_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
 @router.post("/validate")
 async def validate_config(
     config_data: ConfigContent,
     current_user: User = Depends(get_current_user)
 ):
     """Validate configuration content"""
-    try:
-        validation = await borgmatic.validate_config(config_data.content)
-        return ConfigValidation(
-            valid=validation["success"],
-            errors=validation.get("errors", [validation["error"]] if not validation["success"] else []),
-            warnings=validation.get("warnings", [])
-        )
-    except Exception as e:
-        logger.error("Failed to validate config", error=str(e))
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to validate configuration"
-        )
+    validation = await borgmatic.validate_config(config_data.content)
+    return ConfigValidation(
+        valid=validation["success"],
+        errors=validation.get("errors", [validation["error"]] if not validation["success"] else []),
+        warnings=validation.get("warnings", [])
+    )
 
 @router.get("/templates")
 async def get_config_templates(
+    request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """Get available configuration templates"""
-    templates = [
-        ConfigTemplate(
-            name="basic",
-            description="Basic backup configuration",
-            content="""repositories:
-  - path: /path/to/repository
-    label: my-backup
-
-storage:
-  compression: lz4
-  encryption: repokey
-
-retention:
-  keep_daily: 7
-  keep_weekly: 4
-  keep_monthly: 6
-
-consistency:
-  checks:
-    - repository
-    - archives
-  check_last: 3"""
-        ),
-        ConfigTemplate(
-            name="encrypted",
-            description="Encrypted backup configuration",
-            content="""repositories:
-  - path: /path/to/encrypted/repository
-    label: encrypted-backup
-
-storage:
-  compression: zstd
-  encryption: repokey-blake2
-
-retention:
-  keep_daily: 7
-  keep_weekly: 4
-  keep_monthly: 12
-  keep_yearly: 3
-
-consistency:
-  checks:
-    - repository
-    - archives
-  check_last: 3"""
-        ),
-        ConfigTemplate(
-            name="minimal",
-            description="Minimal backup configuration",
-            content="""repositories:
-  - path: /path/to/repository
-
-storage:
-  compression: lz4
-
-retention:
-  keep_daily: 7"""
-        )
-    ]
-    
-    return templates
+    headers = {"ETag": _TEMPLATES_ETAG, "Cache-Control": "private, max-age=30"}
+    if request.headers.get("if-none-match") == _TEMPLATES_ETAG:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return ORJSONResponse(_TEMPLATES_JSON, headers=headers)
 
 @router.post("/backup")
 async def backup_config(
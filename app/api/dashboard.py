@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
+from fastapi_cache.decorator import cache
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from pydantic import BaseModel
-import psutil
+import asyncio
 import structlog
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
@@ -10,7 +12,10 @@ from typing import List, Dict, Any
 from app.database.database import get_db
 from app.database.models import User, BackupJob
 from app.core.security import get_current_user
-from app.core.borgmatic import borgmatic
+from app.core.borgmatic import borgmatic_cache
+from app.core.cache import STATUS_CACHE_TTL, global_key_builder
+from app.core.metrics import get_metrics
+from app.core.clock import now_iso
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -70,27 +75,17 @@ class HealthResponse(BaseModel):
 def get_system_metrics() -> SystemMetrics:
     """Get system resource metrics"""
     try:
-        # CPU usage
-        cpu_usage = psutil.cpu_percent(interval=1)
+        metrics = get_metrics()
         
-        # Memory usage
-        memory = psutil.virtual_memory()
-        
-        # Disk usage
-        disk = psutil.disk_usage('/')
-        
-        # System uptime
-        uptime = int(psutil.boot_time())
-        
-        return SystemMetrics(
-            cpu_usage=cpu_usage,
-            memory_usage=memory.percent,
-            memory_total=memory.total,
-            memory_available=memory.available,
-            disk_usage=disk.percent,
-            disk_total=disk.total,
-            disk_free=disk.free,
-            uptime=uptime
+        return SystemMetrics.model_construct(
+            cpu_usage=metrics["cpu_usage"],
+            memory_usage=metrics["memory_usage"],
+            memory_total=metrics["memory_total"],
+            memory_available=metrics["memory_available"],
+            disk_usage=metrics["disk_usage"],
+            disk_total=metrics["disk_total"],
+            disk_free=metrics["disk_free"],
+            uptime=int(metrics["boot_time"])
         )
     except Exception as e:
         logger.error("Failed to get system metrics", error=str(e))
@@ -102,17 +97,17 @@ def get_system_metrics() -> SystemMetrics:
 async def get_backup_status() -> List[BackupStatus]:
     """Get backup status for all repositories"""
     try:
-        repo_status = await borgmatic.get_repository_status()
+        repo_status = await borgmatic_cache.repository_status()
         if not repo_status["success"]:
             logger.warning("Failed to get repository status", error=repo_status.get("error"))
             return []
         
         status_list = []
         for repo in repo_status["repositories"]:
-            status_list.append(BackupStatus(
+            status_list.append(BackupStatus.model_construct(
                 repository=repo["name"],
                 status=repo["status"],
-                last_backup=repo["last_backup"],
+                last_backup=repo["last_backup"] or "Never",
                 archive_count=repo["archive_count"],
                 total_size=repo["total_size"],
                 health=repo["status"]
@@ -131,7 +126,16 @@ def get_scheduled_jobs(db: Session) -> List[ScheduledJobInfo]:
 def get_recent_jobs(db: Session, limit: int = 10) -> List[Dict[str, Any]]:
     """Get recent backup jobs"""
     try:
-        jobs = db.query(BackupJob).order_by(BackupJob.started_at.desc()).limit(limit).all()
+        # Select only the serialized columns; no ORM objects or relationship loads
+        jobs = db.query(
+            BackupJob.id,
+            BackupJob.repository,
+            BackupJob.status,
+            BackupJob.started_at,
+            BackupJob.completed_at,
+            BackupJob.progress,
+            BackupJob.error_message
+        ).order_by(BackupJob.started_at.desc()).limit(limit).all()
         job_list = []
         
         for job in jobs:
@@ -155,6 +159,10 @@ def get_alerts(db: Session, hours: int = 24) -> List[Dict[str, Any]]:
     # TODO: Implement when SystemLog model is added back
     return []
 
+def get_job_summary(db: Session):
+    """Get scheduled jobs, recent jobs and alerts (these share one Session, so run them together)"""
+    return get_scheduled_jobs(db), get_recent_jobs(db), get_alerts(db)
+
 @router.get("/status", response_model=DashboardStatus)
 async def get_dashboard_status(
     current_user: User = Depends(get_current_user),
@@ -162,29 +170,24 @@ async def get_dashboard_status(
 ):
     """Get comprehensive dashboard status"""
     try:
-        # Get backup status
-        backup_status = await get_backup_status()
+        # Fetch backup status and DB-backed data concurrently
+        backup_status, (scheduled_jobs, recent_jobs, alerts) = await asyncio.gather(
+            get_backup_status(),
+            asyncio.to_thread(get_job_summary, db)
+        )
         
         # Get system metrics
         system_metrics = get_system_metrics()
         
-        # Get scheduled jobs
-        scheduled_jobs = get_scheduled_jobs(db)
-        
-        # Get recent jobs
-        recent_jobs = get_recent_jobs(db)
-        
-        # Get alerts
-        alerts = get_alerts(db)
-        
-        return DashboardStatus(
+        # Everything here is server-generated, so skip validation on the way out
+        return ORJSONResponse(DashboardStatus.model_construct(
             backup_status=backup_status,
             system_metrics=system_metrics,
             scheduled_jobs=scheduled_jobs,
             recent_jobs=recent_jobs,
             alerts=alerts,
-            last_updated=datetime.utcnow().isoformat()
-        )
+            last_updated=now_iso()
+        ).model_dump())
     except Exception as e:
         logger.error("Error getting dashboard status", error=str(e))
         raise HTTPException(
@@ -193,36 +196,19 @@ async def get_dashboard_status(
         )
 
 @router.get("/metrics", response_model=MetricsResponse)
+@cache(expire=STATUS_CACHE_TTL, key_builder=global_key_builder)
 async def get_dashboard_metrics(current_user: User = Depends(get_current_user)):
     """Get system metrics for dashboard"""
     try:
-        # CPU usage
-        cpu_usage = psutil.cpu_percent(interval=1)
+        metrics = get_metrics()
         
-        # Memory usage
-        memory = psutil.virtual_memory()
-        
-        # Disk usage
-        disk = psutil.disk_usage('/')
-        
-        # Network I/O
-        network = psutil.net_io_counters()
-        
-        # Load average
-        load_avg = psutil.getloadavg()
-        
-        return MetricsResponse(
-            cpu_usage=cpu_usage,
-            memory_usage=memory.percent,
-            disk_usage=disk.percent,
-            network_io={
-                "bytes_sent": network.bytes_sent,
-                "bytes_recv": network.bytes_recv,
-                "packets_sent": network.packets_sent,
-                "packets_recv": network.packets_recv
-            },
-            load_average=list(load_avg)
-        )
+        return ORJSONResponse(MetricsResponse.model_construct(
+            cpu_usage=metrics["cpu_usage"],
+            memory_usage=metrics["memory_usage"],
+            disk_usage=metrics["disk_usage"],
+            network_io=metrics["network_io"],
+            load_average=metrics["load_average"]
+        ).model_dump())
     except Exception as e:
         logger.error("Error getting metrics", error=str(e))
         raise HTTPException(
@@ -237,7 +223,7 @@ async def get_dashboard_schedule(
 ):
     """Get scheduled jobs information"""
     try:
-        jobs = get_scheduled_jobs(db)
+        jobs = await asyncio.to_thread(get_scheduled_jobs, db)
         
         # Find next execution time
         next_execution = None
@@ -258,22 +244,31 @@ async def get_dashboard_schedule(
         )
 
 @router.get("/health", response_model=HealthResponse)
+@cache(expire=STATUS_CACHE_TTL, key_builder=global_key_builder)
 async def get_dashboard_health(current_user: User = Depends(get_current_user)):
     """Get system health status"""
     try:
         checks = {}
         
+        # Fetch borgmatic and repository state concurrently
+        system_info, repo_status = await asyncio.gather(
+            borgmatic_cache.system_info(),
+            borgmatic_cache.repository_status(),
+            return_exceptions=True
+        )
+        
         # Check system resources
         try:
-            cpu_usage = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
+            metrics = get_metrics()
+            cpu_usage = metrics["cpu_usage"]
+            memory_usage = metrics["memory_usage"]
+            disk_usage = metrics["disk_usage"]
             
             checks["system"] = {
-                "status": "healthy" if cpu_usage < 90 and memory.percent < 90 and disk.percent < 90 else "warning",
+                "status": "healthy" if cpu_usage < 90 and memory_usage < 90 and disk_usage < 90 else "warning",
                 "cpu_usage": cpu_usage,
-                "memory_usage": memory.percent,
-                "disk_usage": disk.percent
+                "memory_usage": memory_usage,
+                "disk_usage": disk_usage
             }
         except Exception as e:
             checks["system"] = {
@@ -283,7 +278,8 @@ async def get_dashboard_health(current_user: User = Depends(get_current_user)):
         
         # Check borgmatic availability
         try:
-            system_info = await borgmatic.get_system_info()
+            if isinstance(system_info, Exception):
+                raise system_info
             checks["borgmatic"] = {
                 "status": "healthy" if system_info["success"] else "error",
                 "version": system_info.get("borgmatic_version", "Unknown"),
@@ -297,7 +293,8 @@ async def get_dashboard_health(current_user: User = Depends(get_current_user)):
         
         # Check backup repositories
         try:
-            repo_status = await borgmatic.get_repository_status()
+            if isinstance(repo_status, Exception):
+                raise repo_status
             if repo_status["success"]:
                 healthy_repos = sum(1 for repo in repo_status["repositories"] if repo["status"] == "healthy")
                 total_repos = len(repo_status["repositories"])
@@ -327,18 +324,20 @@ async def get_dashboard_health(current_user: User = Depends(get_current_user)):
                 "error": str(e)
             }
         
-        # Overall status
+        # Overall status: worst of the individual checks, in a single pass
         overall_status = "healthy"
-        if any(check["status"] == "error" for check in checks.values()):
-            overall_status = "error"
-        elif any(check["status"] == "warning" for check in checks.values()):
-            overall_status = "warning"
+        for check in checks.values():
+            if check["status"] == "error":
+                overall_status = "error"
+                break
+            if check["status"] == "warning":
+                overall_status = "warning"
         
-        return HealthResponse(
+        return ORJSONResponse(HealthResponse.model_construct(
             status=overall_status,
             checks=checks,
-            timestamp=datetime.utcnow().isoformat()
-        )
+            timestamp=now_iso()
+        ).model_dump())
     except Exception as e:
         logger.error("Error getting health status", error=str(e))
         raise HTTPException(
@@ -1,34 +1,65 @@
 from fastapi import APIRouter, Depends, Request, HTTPException
 from fastapi.responses import StreamingResponse
-from typing import AsyncGenerator, Dict, Any
+from typing import AsyncGenerator, Dict, Any, Optional, Tuple
 import asyncio
-import json
+import orjson
 import structlog
-from datetime import datetime
 from app.core.security import get_current_user
 from app.database.models import User
-from app.core.borgmatic import BorgmaticInterface
+from app.core.borgmatic import borgmatic_cache
+from app.core.clock import now_iso
 
 logger = structlog.get_logger()
 router = APIRouter(tags=["events"])
 
-# Initialize Borgmatic interface
-borgmatic = BorgmaticInterface()
-
 # Store active connections for broadcasting
 active_connections: Dict[str, asyncio.Queue] = {}
 
+# Maximum number of undelivered events buffered per SSE client
+CLIENT_QUEUE_MAXSIZE = 256
+
+# Response headers and keepalive comment frame for SSE streams
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "Cache-Control"
+}
+SSE_KEEPALIVE = b":\n\n"
+
+# Outbox settings for queued broadcasts
+OUTBOX_MAXSIZE = 10_000
+COALESCE_WINDOW = 0.05  # seconds
+
+# Event types where only the newest update per (type, user, job) matters
+COALESCED_EVENT_TYPES = {"backup_progress", "system_status"}
+
 class EventManager:
     """Manages real-time events and broadcasting"""
     
     def __init__(self):
         self.connections: Dict[str, asyncio.Queue] = {}
         self._lock = asyncio.Lock()
+        self._outbox: Optional[asyncio.Queue] = None
+        self._drain_task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start the outbox drainer (requires a running event loop)"""
+        if self._drain_task is None or self._drain_task.done():
+            self._outbox = asyncio.Queue(maxsize=OUTBOX_MAXSIZE)
+            self._drain_task = asyncio.create_task(self._drain_events())
+    
+    async def stop(self):
+        """Cancel the outbox drainer and wait for it to exit"""
+        if self._drain_task is not None:
+            self._drain_task.cancel()
+            await asyncio.gather(self._drain_task, return_exceptions=True)
+            self._drain_task = None
     
     async def add_connection(self, user_id: str) -> asyncio.Queue:
         """Add a new connection for a user"""
         async with self._lock:
-            queue = asyncio.Queue()
+            queue = asyncio.Queue(maxsize=CLIENT_QUEUE_MAXSIZE)
             self.connections[user_id] = queue
             logger.info("Added SSE connection", user_id=user_id, total_connections=len(self.connections))
             return queue
@@ -45,38 +76,91 @@ class EventManager:
         event = {
             "type": event_type,
             "data": data,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": now_iso()
         }
+        self._deliver(event, user_id)
+    
+    def broadcast_event_nowait(self, event_type: str, data: Dict[str, Any], user_id: str = None):
+        """Queue an event for broadcasting without waiting on subscribers"""
+        if self._outbox is None:
+            self.start()
         
-        async with self._lock:
-            if user_id:
-                # Send to specific user
-                if user_id in self.connections:
-                    try:
-                        await self.connections[user_id].put(event)
-                    except Exception as e:
-                        logger.error("Failed to send event to user", user_id=user_id, error=str(e))
-            else:
-                # Broadcast to all users
-                for uid, queue in self.connections.items():
+        event = {
+            "type": event_type,
+            "data": data,
+            "timestamp": now_iso()
+        }
+        try:
+            self._outbox.put_nowait((event, user_id))
+        except asyncio.QueueFull:
+            logger.warning("Event outbox full, dropping event", event_type=event_type, user_id=user_id)
+    
+    def _deliver(self, event: Dict[str, Any], user_id: str = None):
+        """Put an event on the subscriber queues without waiting on any of them"""
+        if user_id:
+            # Send to specific user
+            queue = self.connections.get(user_id)
+            targets = [(user_id, queue)] if queue is not None else []
+        else:
+            # Broadcast to all users; snapshot so connects/disconnects don't race the loop
+            targets = list(self.connections.items())
+        if not targets:
+            return
+        
+        # Encode once; every subscriber queue shares the same payload bytes
+        payload = format_sse_event(event)
+        for uid, queue in targets:
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its oldest buffered event so it still sees the newest state
+                queue.get_nowait()
+                queue.put_nowait(payload)
+                logger.warning("SSE client queue full, dropped oldest event", user_id=uid, event_type=event["type"])
+    
+    async def _drain_events(self):
+        """Fan out queued events, keeping only the newest of rapid updates"""
+        while True:
+            try:
+                pending: Dict[Tuple, Tuple[Dict[str, Any], Optional[str]]] = {}
+                sequence = 0
+                
+                item = await self._outbox.get()
+                await asyncio.sleep(COALESCE_WINDOW)
+                while True:
+                    event, user_id = item
+                    if event["type"] in COALESCED_EVENT_TYPES:
+                        key = (event["type"], user_id, event["data"].get("job_id"))
+                        # Re-insert so the merged event keeps its latest position
+                        pending.pop(key, None)
+                    else:
+                        key = (sequence,)
+                        sequence += 1
+                    pending[key] = item
                     try:
-                        await queue.put(event)
-                    except Exception as e:
-                        logger.error("Failed to broadcast event to user", user_id=uid, error=str(e))
+                        item = self._outbox.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                
+                for event, user_id in pending.values():
+                    self._deliver(event, user_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error draining event outbox", error=str(e))
     
-    async def get_connection_count(self) -> int:
+    def get_connection_count(self) -> int:
         """Get the number of active connections"""
-        async with self._lock:
-            return len(self.connections)
+        return len(self.connections)
 
 # Global event manager instance
 event_manager = EventManager()
 
-def format_sse_event(event: Dict[str, Any]) -> str:
+def format_sse_event(event: Dict[str, Any]) -> bytes:
     """Format an event as Server-Sent Event"""
-    return f"data: {json.dumps(event)}\n\n"
+    return b"data: " + orjson.dumps(event) + b"\n\n"
 
-async def event_generator(user_id: str) -> AsyncGenerator[str, None]:
+async def event_generator(user_id: str) -> AsyncGenerator[bytes, None]:
     """Generate SSE events for a user"""
     queue = await event_manager.add_connection(user_id)
     
@@ -85,18 +169,18 @@ async def event_generator(user_id: str) -> AsyncGenerator[str, None]:
         yield format_sse_event({
             "type": "connection_established",
             "data": {"message": "SSE connection established"},
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": now_iso()
         })
         
         # Keep connection alive and send events
         while True:
             try:
                 # Wait for events with timeout
-                event = await asyncio.wait_for(queue.get(), timeout=30.0)
-                yield format_sse_event(event)
+                payload = await asyncio.wait_for(queue.get(), timeout=30.0)
+                yield payload
             except asyncio.TimeoutError:
                 # Send keepalive ping
-                yield ":\n\n"
+                yield SSE_KEEPALIVE
             except Exception as e:
                 logger.error("Error in event generator", user_id=user_id, error=str(e))
                 break
@@ -115,12 +199,7 @@ async def stream_events(
         return StreamingResponse(
             event_generator(str(current_user.id)),
             media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Cache-Control"
-            }
+            headers=SSE_HEADERS
         )
     except Exception as e:
         logger.error("Failed to start event stream", user_id=current_user.id, error=str(e))
@@ -136,7 +215,7 @@ async def send_backup_progress(
 ):
     """Send backup progress update (internal use)"""
     try:
-        await event_manager.broadcast_event(
+        event_manager.broadcast_event_nowait(
             "backup_progress",
             {
                 "job_id": job_id,
@@ -162,7 +241,7 @@ async def send_system_status(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     try:
-        await event_manager.broadcast_event(
+        event_manager.broadcast_event_nowait(
             "system_status",
             status_data
         )
@@ -182,12 +261,12 @@ async def send_log_update(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     try:
-        await event_manager.broadcast_event(
+        event_manager.broadcast_event_nowait(
             "log_update",
             {
                 "log_type": log_type,
                 "log_data": log_data,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": now_iso()
             }
         )
         return {"success": True, "message": "Log update sent"}
@@ -202,7 +281,7 @@ async def get_connection_count(current_user: User = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Admin access required")
     
     try:
-        count = await event_manager.get_connection_count()
+        count = event_manager.get_connection_count()
         return {
             "success": True,
             "active_connections": count
@@ -217,10 +296,10 @@ async def periodic_system_status():
     while True:
         try:
             # Get system information
-            system_info = await borgmatic.get_system_info()
+            system_info = await borgmatic_cache.system_info()
             
             if system_info["success"]:
-                await event_manager.broadcast_event(
+                event_manager.broadcast_event_nowait(
                     "system_status",
                     {
                         "type": "periodic_update",
@@ -247,11 +326,3 @@ async def monitor_backup_jobs():
         except Exception as e:
             logger.error("Error in backup job monitoring", error=str(e))
             await asyncio.sleep(5)
-
-# Startup event to start background tasks
-@router.on_event("startup")
-async def startup_event():
-    """Start background tasks on startup"""
-    asyncio.create_task(periodic_system_status())
-    asyncio.create_task(monitor_backup_jobs())
-    logger.info("Started SSE background tasks")
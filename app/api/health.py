@@ -1,72 +1,57 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-import psutil
+from fastapi_cache.decorator import cache
+import asyncio
 import structlog
 import time
 import os
-import subprocess
+from datetime import datetime
+from functools import lru_cache
 from typing import List, Dict, Any
 
 from app.database.models import User
 from app.core.security import get_current_user
-from app.core.borgmatic import borgmatic
+from app.core.borgmatic import borgmatic_cache
+from app.core.cache import STATUS_CACHE_TTL, global_key_builder
+from app.core.metrics import get_metrics
 
 logger = structlog.get_logger()
 router = APIRouter()
 
+@lru_cache(maxsize=256)
+def _parse_timestamp(value: str) -> float:
+    """Convert a local ISO-format timestamp to epoch seconds"""
+    return datetime.fromisoformat(value).timestamp()
+
 @router.get("/system")
+@cache(expire=STATUS_CACHE_TTL, key_builder=global_key_builder)
 async def get_system_health(
     current_user: User = Depends(get_current_user)
 ):
     """Get comprehensive system health status"""
     try:
-        # CPU usage
-        cpu_usage = psutil.cpu_percent(interval=1)
-        
-        # Memory usage
-        memory = psutil.virtual_memory()
-        
-        # Disk usage
-        disk = psutil.disk_usage('/')
+        # CPU, memory and disk usage from the background sampler
+        metrics = get_metrics()
+        cpu_usage = metrics["cpu_usage"]
+        memory_usage = metrics["memory_usage"]
+        disk_usage = metrics["disk_usage"]
         
         # System uptime
-        uptime = time.time() - psutil.boot_time()
+        uptime = time.time() - metrics["boot_time"]
         
-        # Network status (simple check)
-        network_status = "connected"
-        try:
-            # Try to ping a reliable host
-            subprocess.run(["ping", "-c", "1", "8.8.8.8"], 
-                         capture_output=True, timeout=5, check=True)
-        except (subprocess.TimeoutExpired, subprocess.CalledProcessError, FileNotFoundError):
-            network_status = "disconnected"
+        # Network status from the sampler's periodic TCP probe
+        network_status = metrics["network_status"]
         
         # Temperature (if available)
-        temperature = None
-        try:
-            # Try to read temperature from common locations
-            temp_paths = [
-                "/sys/class/thermal/thermal_zone0/temp",
-                "/sys/class/hwmon/hwmon0/temp1_input",
-                "/proc/acpi/thermal_zone/THM0/temperature"
-            ]
-            for temp_path in temp_paths:
-                if os.path.exists(temp_path):
-                    with open(temp_path, 'r') as f:
-                        temp_raw = f.read().strip()
-                        if temp_raw.isdigit():
-                            temperature = float(temp_raw) / 1000.0  # Convert from millidegrees
-                            break
-        except Exception:
-            pass  # Temperature reading is optional
+        temperature = metrics["temperature"]
         
         return {
             "cpu_usage": cpu_usage,
-            "memory_usage": memory.percent,
-            "disk_usage": disk.percent,
+            "memory_usage": memory_usage,
+            "disk_usage": disk_usage,
             "network_status": network_status,
             "uptime": uptime,
             "temperature": temperature,
-            "status": "healthy" if cpu_usage < 90 and memory.percent < 90 and disk.percent < 90 else "warning"
+            "status": "healthy" if cpu_usage < 90 and memory_usage < 90 and disk_usage < 90 else "warning"
         }
     except Exception as e:
         logger.error("Failed to get system health", error=str(e))
@@ -76,13 +61,14 @@ async def get_system_health(
         )
 
 @router.get("/repositories")
+@cache(expire=STATUS_CACHE_TTL, key_builder=global_key_builder)
 async def get_repository_health(
     current_user: User = Depends(get_current_user)
 ):
     """Get comprehensive repository health status"""
     try:
         # Get repository status from borgmatic
-        repo_status = await borgmatic.get_repository_status()
+        repo_status = await borgmatic_cache.repository_status()
         
         if not repo_status.get("success", False):
             return {
@@ -91,11 +77,19 @@ async def get_repository_health(
                 "message": "Failed to get repository status"
             }
         
+        # Get detailed repository information for all repositories concurrently
+        repos = repo_status.get("repositories", [])
+        repo_infos = await asyncio.gather(
+            *(borgmatic_cache.repository_info(repo.get("path", "")) for repo in repos),
+            return_exceptions=True
+        )
+        
         repositories = []
-        for repo in repo_status.get("repositories", []):
+        all_healthy = True
+        for repo, repo_info in zip(repos, repo_infos):
             try:
-                # Get detailed repository information
-                repo_info = await borgmatic.get_repository_info(repo.get("path", ""))
+                if isinstance(repo_info, Exception):
+                    raise repo_info
                 
                 # Determine repository health status
                 status = "healthy"
@@ -117,9 +111,7 @@ async def get_repository_health(
                 
                 # Check backup age
                 if repo_info.get("last_backup"):
-                    last_backup_time = time.mktime(time.strptime(
-                        repo_info["last_backup"], "%Y-%m-%d %H:%M:%S"
-                    ))
+                    last_backup_time = _parse_timestamp(repo_info["last_backup"])
                     days_since_backup = (time.time() - last_backup_time) / 86400
                     if days_since_backup > 7:
                         status = "warning"
@@ -152,10 +144,14 @@ async def get_repository_health(
                     "integrity_check": False,
                     "errors": [f"Failed to get repository info: {str(e)}"]
                 })
+            
+            # Track the overall status as we go instead of rescanning the list
+            if repositories[-1]["status"] != "healthy":
+                all_healthy = False
         
         return {
             "repositories": repositories,
-            "status": "healthy" if all(r["status"] == "healthy" for r in repositories) else "warning"
+            "status": "healthy" if all_healthy else "warning"
         }
         
     except Exception as e:
@@ -171,7 +167,7 @@ async def get_backup_health(
 ):
     """Get backup health status (legacy endpoint for compatibility)"""
     try:
-        repo_status = await borgmatic.get_repository_status()
+        repo_status = await borgmatic_cache.repository_status()
         return {
             "repositories": repo_status.get("repositories", []),
             "status": "healthy" if repo_status["success"] else "error"
@@ -1,18 +1,186 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import List, Optional
+from fastapi.responses import FileResponse, ORJSONResponse
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+from collections import deque
 from datetime import datetime, timedelta
+import asyncio
+import mmap
 import os
 import re
+import threading
 from app.core.security import get_current_user
 from app.database.models import User
-from app.core.borgmatic import BorgmaticInterface
 import structlog
 
 logger = structlog.get_logger()
 router = APIRouter(tags=["logs"])
 
-# Initialize Borgmatic interface
-borgmatic = BorgmaticInterface()
+# Log file for each log type
+LOG_PATHS = {
+    "borgmatic": "/app/logs/borgmatic.log",
+    "system": "/var/log/syslog",
+    "application": "/app/logs/app.log"
+}
+
+# Log line timestamp, matched against raw bytes
+_TS_RE = re.compile(rb'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})')
+
+# Counters reported by get_log_stats, in bucket order
+_STAT_FIELDS = ("total_entries", "error_count", "warning_count", "info_count")
+
+# Level keywords in order of precedence, with their index in _STAT_FIELDS
+_LEVELS = ((b"error", 1), (b"warning", 2), (b"info", 3))
+
+# Bytes read per call when scanning a log for stats
+_READ_CHUNK = 1 << 20
+
+# Most (log path, hours) windows whose counts are kept between requests
+_STATS_CACHE_MAX = 16
+
+class _LogStats:
+    """Per-second level counts for the recent part of a log, extended as the file grows"""
+    
+    def __init__(self):
+        self.inode: Optional[int] = None
+        self.offset = 0
+        self.buckets: Deque[Tuple[Tuple[int, ...], List[int]]] = deque()
+
+_stats_cache: Dict[Tuple[str, int], _LogStats] = {}
+_stats_lock = threading.Lock()
+
+def _resolve_log_path(log_type: str, allow_system: bool = True) -> str:
+    """Map a log type to its file path, rejecting unknown (or disallowed) types"""
+    log_path = LOG_PATHS.get(log_type)
+    if log_path is None or (log_type == "system" and not allow_system):
+        raise HTTPException(status_code=400, detail="Invalid log type")
+    return log_path
+
+def _parse_ts(ts: bytes) -> Tuple[int, ...]:
+    """Split a 'YYYY-MM-DD HH:MM:SS' timestamp into a comparable tuple by fixed offsets"""
+    return (int(ts[0:4]), int(ts[5:7]), int(ts[8:10]), int(ts[11:13]), int(ts[14:16]), int(ts[17:19]), 0)
+
+def _ts_key(dt: datetime) -> Tuple[int, ...]:
+    """Comparable tuple for a datetime, matching the layout of _parse_ts"""
+    return (dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second, dt.microsecond)
+
+def _count_lines(data: bytes, buckets: Deque, threshold_key: Tuple[int, ...]):
+    """Add the entries in a block of complete log lines to the per-second buckets"""
+    for line in data.split(b"\n"):
+        timestamp_match = _TS_RE.search(line)
+        if not timestamp_match:
+            continue
+        key = _parse_ts(timestamp_match.group(1))
+        if key < threshold_key:
+            continue
+        
+        if buckets and buckets[-1][0] == key:
+            counts = buckets[-1][1]
+        else:
+            counts = [0] * len(_STAT_FIELDS)
+            buckets.append((key, counts))
+        counts[0] += 1
+        
+        # Count by level
+        line_lower = line.lower()
+        for keyword, index in _LEVELS:
+            if keyword in line_lower:
+                counts[index] += 1
+                break
+
+def _window_log_stats(log_path: str, hours: int) -> Dict[str, int]:
+    """Update the cached counts for a log and total the ones inside the last `hours`"""
+    threshold_key = _ts_key(datetime.now() - timedelta(hours=hours))
+    
+    with _stats_lock:
+        cache = _stats_cache.get((log_path, hours))
+        if cache is None:
+            if len(_stats_cache) >= _STATS_CACHE_MAX:
+                _stats_cache.pop(next(iter(_stats_cache)))
+            cache = _stats_cache[(log_path, hours)] = _LogStats()
+        
+        st = os.stat(log_path)
+        if st.st_ino != cache.inode or st.st_size < cache.offset:
+            # New, rotated or truncated file: start over
+            cache.inode = st.st_ino
+            cache.offset = 0
+            cache.buckets.clear()
+        
+        if st.st_size > cache.offset:
+            with open(log_path, 'rb', buffering=0) as f:
+                f.seek(cache.offset)
+                remaining = st.st_size - cache.offset
+                tail = b""
+                while remaining > 0:
+                    chunk = f.read(min(_READ_CHUNK, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    data = tail + chunk
+                    # Only consume complete lines; a partial one is carried into the next chunk,
+                    # or read next time if it is still being written
+                    end = data.rfind(b"\n") + 1
+                    _count_lines(data[:end], cache.buckets, threshold_key)
+                    cache.offset += end
+                    tail = data[end:]
+        
+        # Drop buckets that have slid out of the window
+        buckets = cache.buckets
+        while buckets and buckets[0][0] < threshold_key:
+            buckets.popleft()
+        
+        totals = [0] * len(_STAT_FIELDS)
+        for key, counts in buckets:
+            if key >= threshold_key:
+                for index, count in enumerate(counts):
+                    totals[index] += count
+    
+    return dict(zip(_STAT_FIELDS, totals))
+
+def _iter_lines_reversed(mm: mmap.mmap) -> Iterator[bytes]:
+    """Yield lines of a mapped file from last to first, keeping their newlines"""
+    end = len(mm)
+    while end > 0:
+        start = mm.rfind(b"\n", 0, end - 1) + 1
+        yield mm[start:end]
+        end = start
+
+def _scan_log(log_path: str, lines: int, matches: Callable[[bytes], bool]) -> List[str]:
+    """Return the last `lines` matching lines of a log file (all of them if lines <= 0)"""
+    found = []
+    with open(log_path, 'rb') as f:
+        # mmap can't map an empty file
+        if os.fstat(f.fileno()).st_size == 0:
+            return found
+        # Only the pages we actually walk back over get read from disk
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for raw in _iter_lines_reversed(mm):
+                if matches(raw):
+                    found.append(raw.decode('utf-8', 'replace'))
+                    if len(found) == lines:
+                        break
+    found.reverse()
+    return found
+
+def _tail_log(log_path: str, lines: int) -> List[str]:
+    """Return the last `lines` lines of a log file (all of them if lines <= 0)"""
+    with open(log_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Walk back over `lines` newlines, then decode the tail in one go
+            start = size if lines > 0 else 0
+            for _ in range(max(lines, 0)):
+                if start == 0:
+                    break
+                start = mm.rfind(b"\n", 0, start - 1) + 1
+            tail = mm[start:].decode('utf-8', 'replace')
+    
+    parts = tail.split("\n")
+    result = [part + "\n" for part in parts[:-1]]
+    if parts[-1]:
+        result.append(parts[-1])
+    return result
 
 @router.get("/")
 async def get_logs(
@@ -22,71 +190,80 @@ async def get_logs(
     search: Optional[str] = Query(None, description="Search term"),
     level: Optional[str] = Query(None, description="Log level filter"),
     start_time: Optional[datetime] = Query(None, description="Start time filter"),
-    end_time: Optional[datetime] = Query(None, description="End time filter")
+    end_time: Optional[datetime] = Query(None, description="End time filter"),
+    raw: bool = Query(False, description="Download the whole log file as plain text (other filters are ignored)")
 ):
     """Get logs with optional filtering and search"""
+    # Determine log file path based on type
+    log_path = _resolve_log_path(log_type)
+    
     try:
-        # Determine log file path based on type
-        if log_type == "borgmatic":
-            log_path = "/app/logs/borgmatic.log"
-        elif log_type == "system":
-            log_path = "/var/log/syslog"
-        elif log_type == "application":
-            log_path = "/app/logs/app.log"
-        else:
-            raise HTTPException(status_code=400, detail="Invalid log type")
-        
         if not os.path.exists(log_path):
             return {
                 "success": True,
                 "logs": [],
-                "total_lines": 0,
+                "returned_lines": 0,
                 "message": f"Log file {log_path} not found"
             }
         
-        # Read log file
-        with open(log_path, 'r') as f:
-            all_lines = f.readlines()
+        if raw:
+            # Let the server send the file straight from the page cache
+            return FileResponse(log_path, media_type="text/plain")
         
-        # Apply filters
-        filtered_lines = []
-        for line in all_lines:
-            # Apply search filter
-            if search and search.lower() not in line.lower():
-                continue
-            
-            # Apply level filter
-            if level and level.upper() not in line.upper():
-                continue
+        # Compare timestamps as tuples so no datetime is built per line
+        start_key = _ts_key(start_time) if start_time else None
+        end_key = _ts_key(end_time) if end_time else None
+        
+        # Case-fold the search and level filters once, for matching against raw bytes
+        search_needle = search.lower().encode() if search else None
+        level_needle = level.lower().encode() if level else None
+        
+        def matches(raw: bytes) -> bool:
+            if search_needle or level_needle:
+                # One lowered copy of the line serves both filters
+                raw_lower = raw.lower()
+                
+                # Apply search filter
+                if search_needle and search_needle not in raw_lower:
+                    return False
+                
+                # Apply level filter
+                if level_needle and level_needle not in raw_lower:
+                    return False
             
             # Apply time filter (basic implementation)
             if start_time or end_time:
                 try:
                     # Extract timestamp from log line (adjust pattern as needed)
-                    timestamp_match = re.search(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})', line)
+                    timestamp_match = _TS_RE.search(raw)
                     if timestamp_match:
-                        log_time = datetime.strptime(timestamp_match.group(1), '%Y-%m-%d %H:%M:%S')
-                        if start_time and log_time < start_time:
-                            continue
-                        if end_time and log_time > end_time:
-                            continue
+                        log_time = _parse_ts(timestamp_match.group(1))
+                        if start_key and log_time < start_key:
+                            return False
+                        if end_key and log_time > end_key:
+                            return False
                 except:
                     pass  # Skip time filtering if timestamp parsing fails
             
-            filtered_lines.append(line)
+            return True
         
-        # Get requested number of lines (from end)
-        total_lines = len(filtered_lines)
-        if lines > 0:
-            filtered_lines = filtered_lines[-lines:]
+        # Get requested number of matching lines, scanning back from the end of the file
+        if search or level or start_time or end_time:
+            filtered_lines = await asyncio.to_thread(_scan_log, log_path, lines, matches)
+        else:
+            # No filters: take the last lines without looking at their content
+            filtered_lines = await asyncio.to_thread(_tail_log, log_path, lines)
+        returned_lines = len(filtered_lines)
         
-        return {
+        # Lines are already str; hand them straight to orjson rather than
+        # letting FastAPI walk every one through jsonable_encoder first
+        return ORJSONResponse({
             "success": True,
             "logs": filtered_lines,
-            "total_lines": total_lines,
+            "returned_lines": returned_lines,
             "log_type": log_type,
             "log_path": log_path
-        }
+        })
         
     except Exception as e:
         logger.error("Failed to get logs", error=str(e), log_type=log_type)
@@ -100,19 +277,19 @@ async def get_log_types(current_user: User = Depends(get_current_user)):
             "id": "borgmatic",
             "name": "Borgmatic Logs",
             "description": "Backup operation logs",
-            "path": "/app/logs/borgmatic.log"
+            "path": LOG_PATHS["borgmatic"]
         },
         {
             "id": "application",
             "name": "Application Logs",
             "description": "Web UI application logs",
-            "path": "/app/logs/app.log"
+            "path": LOG_PATHS["application"]
         },
         {
             "id": "system",
             "name": "System Logs",
             "description": "System and service logs",
-            "path": "/var/log/syslog"
+            "path": LOG_PATHS["system"]
         }
     ]
     
@@ -128,17 +305,10 @@ async def get_log_stats(
     hours: int = Query(24, description="Hours to analyze")
 ):
     """Get log statistics for the specified time period"""
+    # Determine log file path
+    log_path = _resolve_log_path(log_type)
+    
     try:
-        # Determine log file path
-        if log_type == "borgmatic":
-            log_path = "/app/logs/borgmatic.log"
-        elif log_type == "system":
-            log_path = "/var/log/syslog"
-        elif log_type == "application":
-            log_path = "/app/logs/app.log"
-        else:
-            raise HTTPException(status_code=400, detail="Invalid log type")
-        
         if not os.path.exists(log_path):
             return {
                 "success": True,
@@ -151,40 +321,9 @@ async def get_log_stats(
                 }
             }
         
-        # Calculate time threshold
-        threshold_time = datetime.now() - timedelta(hours=hours)
-        
-        # Read and analyze logs
-        with open(log_path, 'r') as f:
-            lines = f.readlines()
-        
-        stats = {
-            "total_entries": 0,
-            "error_count": 0,
-            "warning_count": 0,
-            "info_count": 0,
-            "success_rate": 0.0
-        }
-        
-        for line in lines:
-            try:
-                # Extract timestamp and check if within time range
-                timestamp_match = re.search(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})', line)
-                if timestamp_match:
-                    log_time = datetime.strptime(timestamp_match.group(1), '%Y-%m-%d %H:%M:%S')
-                    if log_time >= threshold_time:
-                        stats["total_entries"] += 1
-                        
-                        # Count by level
-                        line_lower = line.lower()
-                        if "error" in line_lower:
-                            stats["error_count"] += 1
-                        elif "warning" in line_lower:
-                            stats["warning_count"] += 1
-                        elif "info" in line_lower:
-                            stats["info_count"] += 1
-            except:
-                continue
+        # Count entries in the window, reading only what was appended since the last call
+        stats = await asyncio.to_thread(_window_log_stats, log_path, hours)
+        stats["success_rate"] = 0.0
         
         # Calculate success rate (basic implementation)
         if stats["total_entries"] > 0:
@@ -210,15 +349,10 @@ async def clear_logs(
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
     
+    # Determine log file path
+    log_path = _resolve_log_path(log_type, allow_system=False)
+    
     try:
-        # Determine log file path
-        if log_type == "borgmatic":
-            log_path = "/app/logs/borgmatic.log"
-        elif log_type == "application":
-            log_path = "/app/logs/app.log"
-        else:
-            raise HTTPException(status_code=400, detail="Invalid log type")
-        
         if os.path.exists(log_path):
             # Clear the log file
             with open(log_path, 'w') as f:
@@ -1,16 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+from functools import lru_cache
+from cryptography.fernet import Fernet
+import base64
 import structlog
 import os
 import subprocess
 import asyncio
+import tempfile
 
 from app.database.database import get_db
 from app.database.models import User, Repository
 from app.core.security import get_current_user
-from app.core.borgmatic import BorgmaticInterface
+from app.core.borgmatic import BorgmaticInterface, BorgmaticCache
 from app.config import settings
 
 logger = structlog.get_logger()
@@ -19,6 +25,21 @@ router = APIRouter(tags=["repositories"])
 # Initialize Borgmatic interface
 borgmatic = BorgmaticInterface()
 
+# Directories local repositories may be created in
+ALLOWED_REPOSITORY_DIRS = [
+    settings.borgmatic_backup_path,
+    "/backups",
+    "/opt/speedbits/backups",
+    "/app/backups",
+    "/tmp/backups"
+]
+# Normalized once, with a trailing separator so "/backups-evil" doesn't match "/backups"
+_ALLOWED_ABS = tuple(os.path.join(os.path.abspath(d), "") for d in ALLOWED_REPOSITORY_DIRS)
+
+# How long repository stats are reused (seconds); each fetch runs borg twice
+REPOSITORY_STATS_TTL = 30
+repository_stats_cache = BorgmaticCache(borgmatic, ttl=REPOSITORY_STATS_TTL)
+
 # Pydantic models
 from pydantic import BaseModel
 
@@ -53,6 +74,15 @@ class RepositoryInfo(BaseModel):
     created_at: str
     updated_at: Optional[str]
 
+def _unique_violation_detail(error: IntegrityError) -> str:
+    """Describe which unique repository column an IntegrityError tripped over"""
+    message = str(error.orig).lower()
+    if "path" in message:
+        return "Repository path already exists"
+    if "name" in message:
+        return "Repository name already exists"
+    return "Repository already exists"
+
 @router.get("/")
 async def get_repositories(
     current_user: User = Depends(get_current_user),
@@ -60,7 +90,20 @@ async def get_repositories(
 ):
     """Get all repositories"""
     try:
-        repositories = db.query(Repository).all()
+        # Select only the serialized columns; no ORM objects or identity map entries
+        repositories = db.query(
+            Repository.id,
+            Repository.name,
+            Repository.path,
+            Repository.encryption,
+            Repository.compression,
+            Repository.last_backup,
+            Repository.total_size,
+            Repository.archive_count,
+            Repository.is_active,
+            Repository.created_at,
+            Repository.updated_at
+        ).all()
         return {
             "success": True,
             "repositories": [
@@ -105,24 +148,13 @@ async def create_repository(
                 repo_path = os.path.join(settings.borgmatic_backup_path, repo_path)
             
             # Security check: ensure path is within allowed directories
-            allowed_dirs = [
-                settings.borgmatic_backup_path,
-                "/backups",
-                "/opt/speedbits/backups",
-                "/app/backups",
-                "/tmp/backups"
-            ]
-            
-            path_allowed = False
-            for allowed_dir in allowed_dirs:
-                if os.path.abspath(repo_path).startswith(os.path.abspath(allowed_dir)):
-                    path_allowed = True
-                    break
+            abs_repo_path = os.path.join(os.path.abspath(repo_path), "")
+            path_allowed = any(abs_repo_path.startswith(allowed_dir) for allowed_dir in _ALLOWED_ABS)
             
             if not path_allowed:
                 raise HTTPException(
                     status_code=400, 
-                    detail=f"Repository path must be within allowed directories: {', '.join(allowed_dirs)}"
+                    detail=f"Repository path must be within allowed directories: {', '.join(ALLOWED_REPOSITORY_DIRS)}"
                 )
             
             # Create directory if it doesn't exist
@@ -150,14 +182,13 @@ async def create_repository(
         else:
             raise HTTPException(status_code=400, detail="Invalid repository type. Must be 'local', 'ssh', or 'sftp'")
         
-        # Check if repository name already exists
-        existing_repo = db.query(Repository).filter(Repository.name == repo_data.name).first()
-        if existing_repo:
-            raise HTTPException(status_code=400, detail="Repository name already exists")
-        
-        # Check if repository path already exists
-        existing_path = db.query(Repository).filter(Repository.path == repo_path).first()
-        if existing_path:
+        # Check if repository name or path already exists, in one query
+        existing = db.query(Repository.name, Repository.path).filter(
+            or_(Repository.name == repo_data.name, Repository.path == repo_path)
+        ).first()
+        if existing:
+            if existing.name == repo_data.name:
+                raise HTTPException(status_code=400, detail="Repository name already exists")
             raise HTTPException(status_code=400, detail="Repository path already exists")
         
         # Directory creation is now handled above in the validation section
@@ -193,8 +224,14 @@ async def create_repository(
         )
         
         db.add(repository)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError as ie:
+            # A concurrent create took the name or path after the check above
+            db.rollback()
+            raise HTTPException(status_code=400, detail=_unique_violation_detail(ie))
         db.refresh(repository)
+        repository_stats_cache.invalidate(repo_path)
         
         logger.info("Repository created", name=repo_data.name, path=repo_path, user=current_user.username)
         
@@ -272,23 +309,9 @@ async def update_repository(
         
         # Update fields
         if repo_data.name is not None:
-            # Check if name already exists
-            existing_repo = db.query(Repository).filter(
-                Repository.name == repo_data.name,
-                Repository.id != repo_id
-            ).first()
-            if existing_repo:
-                raise HTTPException(status_code=400, detail="Repository name already exists")
             repository.name = repo_data.name
         
         if repo_data.path is not None:
-            # Check if path already exists
-            existing_path = db.query(Repository).filter(
-                Repository.path == repo_data.path,
-                Repository.id != repo_id
-            ).first()
-            if existing_path:
-                raise HTTPException(status_code=400, detail="Repository path already exists")
             repository.path = repo_data.path
         
         if repo_data.compression is not None:
@@ -298,7 +321,12 @@ async def update_repository(
             repository.is_active = repo_data.is_active
         
         repository.updated_at = datetime.utcnow()
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError as ie:
+            # Name and path are unique in the schema; let the constraint catch collisions
+            db.rollback()
+            raise HTTPException(status_code=400, detail=_unique_violation_detail(ie))
         
         logger.info("Repository updated", repo_id=repo_id, user=current_user.username)
         
@@ -315,6 +343,7 @@ async def update_repository(
 @router.delete("/{repo_id}")
 async def delete_repository(
     repo_id: int,
+    force: bool = Query(False, description="Delete without checking the repository for archives"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -327,24 +356,28 @@ async def delete_repository(
         if not repository:
             raise HTTPException(status_code=404, detail="Repository not found")
         
-        # Check if repository has archives
-        archives_result = await borgmatic.list_archives(repository.path)
-        if archives_result["success"]:
-            try:
-                archives_data = archives_result["stdout"]
-                if archives_data and len(archives_data) > 0:
-                    raise HTTPException(
-                        status_code=400, 
-                        detail="Cannot delete repository with existing archives. Please delete all archives first."
-                    )
-            except:
-                pass
+        # Check if repository has archives; if borg can't tell us, don't assume it is
+        # empty. Only the database record is removed, so an admin may force it.
+        if not force:
+            archive_check = await borgmatic.has_any_archive(repository.path)
+            if not archive_check["success"]:
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Could not check repository for archives: {archive_check['stderr'].strip()}. "
+                           "Use force=true to remove the repository record anyway."
+                )
+            if archive_check["has_archives"]:
+                raise HTTPException(
+                    status_code=400, 
+                    detail="Cannot delete repository with existing archives. Please delete all archives first."
+                )
         
         # Delete repository from database
         db.delete(repository)
         db.commit()
+        repository_stats_cache.invalidate(repository.path)
         
-        logger.info("Repository deleted", repo_id=repo_id, user=current_user.username)
+        logger.info("Repository deleted", repo_id=repo_id, user=current_user.username, force=force)
         
         return {
             "success": True,
@@ -370,6 +403,7 @@ async def check_repository(
         
         # Run repository check
         check_result = await borgmatic.check_repository(repository.path)
+        repository_stats_cache.invalidate(repository.path)
         
         return {
             "success": True,
@@ -398,6 +432,7 @@ async def compact_repository(
         
         # Run repository compaction
         compact_result = await borgmatic.compact_repository(repository.path)
+        repository_stats_cache.invalidate(repository.path)
         
         return {
             "success": True,
@@ -434,25 +469,49 @@ async def get_repository_statistics(
         logger.error("Failed to get repository statistics", error=str(e))
         raise HTTPException(status_code=500, detail=f"Failed to get repository statistics: {str(e)}")
 
+@lru_cache(maxsize=1)
+def _ssh_key_cipher() -> Fernet:
+    """Cipher for stored SSH private keys, built once from the secret key"""
+    encryption_key = settings.secret_key.encode()[:32]
+    return Fernet(base64.urlsafe_b64encode(encryption_key))
+
+# Only a successful probe is remembered, so borg installed later is still picked up
+_BORG_OK = False
+# Created on first use so it binds to the running event loop
+_borg_probe_lock: Optional[asyncio.Lock] = None
+
+async def _ensure_borg() -> bool:
+    """Check that the borg command is available, probing until it is found"""
+    global _BORG_OK, _borg_probe_lock
+    if _BORG_OK:
+        return True
+    if _borg_probe_lock is None:
+        _borg_probe_lock = asyncio.Lock()
+    async with _borg_probe_lock:
+        if not _BORG_OK:
+            try:
+                # Test if borg command exists
+                test_process = await asyncio.create_subprocess_exec(
+                    "borg", "--version",
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL
+                )
+                await test_process.wait()
+                _BORG_OK = test_process.returncode == 0
+                if not _BORG_OK:
+                    logger.error("Borg not available", returncode=test_process.returncode)
+            except (FileNotFoundError, OSError) as e:
+                logger.error("Borg not available", error=str(e))
+    return _BORG_OK
+
 async def initialize_borg_repository(path: str, encryption: str, passphrase: str = None, ssh_key_id: int = None) -> Dict[str, Any]:
     """Initialize a new Borg repository"""
     try:
         # Check if borg is available
-        try:
-            # Test if borg command exists
-            test_process = await asyncio.create_subprocess_exec(
-                "borg", "--version",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            await test_process.communicate()
-            if test_process.returncode != 0:
-                raise FileNotFoundError("borg command not found")
-        except (FileNotFoundError, OSError) as e:
-            logger.error("Borg not available", error=str(e))
+        if not await _ensure_borg():
             return {
                 "success": False,
-                "error": f"Borg not available: {str(e)}"
+                "error": "Borg not available: borg command not found"
             }
         
         # Build borg init command
@@ -464,12 +523,11 @@ async def initialize_borg_repository(path: str, encryption: str, passphrase: str
             env["BORG_PASSPHRASE"] = passphrase
         
         # Handle SSH key for remote repositories
+        temp_key_file = None
         if ssh_key_id and path.startswith("ssh://"):
             # Get SSH key from database
             from app.database.models import SSHKey
             from app.database.database import get_db
-            from cryptography.fernet import Fernet
-            import base64
             
             db = next(get_db())
             ssh_key = db.query(SSHKey).filter(SSHKey.id == ssh_key_id).first()
@@ -480,15 +538,14 @@ async def initialize_borg_repository(path: str, encryption: str, passphrase: str
                 }
             
             # Decrypt private key
-            encryption_key = settings.secret_key.encode()[:32]
-            cipher = Fernet(base64.urlsafe_b64encode(encryption_key))
-            private_key = cipher.decrypt(ssh_key.private_key.encode()).decode()
+            private_key = _ssh_key_cipher().decrypt(ssh_key.private_key.encode())
             
-            # Create temporary key file
-            import tempfile
-            with tempfile.NamedTemporaryFile(mode='w', delete=False) as f:
-                f.write(private_key)
-                temp_key_file = f.name
+            # Create temporary key file (mkstemp makes it readable only by us)
+            fd, temp_key_file = tempfile.mkstemp()
+            try:
+                os.write(fd, private_key)
+            finally:
+                os.close(fd)
             
             # Set SSH key environment variable
             env["BORG_RSH"] = f"ssh -i {temp_key_file} -o StrictHostKeyChecking=no"
@@ -496,15 +553,20 @@ async def initialize_borg_repository(path: str, encryption: str, passphrase: str
         # Add repository path
         cmd.append(path)
         
-        # Execute command
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            env=env
-        )
-        
-        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=60)
+        try:
+            # Execute command; only stderr is used, for error reporting
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+                env=env
+            )
+            
+            _, stderr = await asyncio.wait_for(process.communicate(), timeout=60)
+        finally:
+            # The decrypted key is only needed while borg runs
+            if temp_key_file:
+                os.unlink(temp_key_file)
         
         if process.returncode == 0:
             return {
@@ -543,10 +605,17 @@ async def get_repository_passphrase(repository_id: int, db: Session) -> str:
         return None
 
 async def get_repository_stats(path: str) -> Dict[str, Any]:
+    """Get repository statistics, reusing a result younger than the TTL"""
+    return await repository_stats_cache.get(path, lambda: _fetch_repository_stats(path))
+
+async def _fetch_repository_stats(path: str) -> Dict[str, Any]:
     """Get repository statistics"""
     try:
-        # Get repository info
-        info_result = await borgmatic._execute_command(["borg", "info", path])
+        # Get repository info and the archive list concurrently
+        info_result, archives_result = await asyncio.gather(
+            borgmatic._execute_command(["borg", "info", path]),
+            borgmatic.list_archives(path)
+        )
         
         if not info_result["success"]:
             return {
@@ -566,7 +635,6 @@ async def get_repository_stats(path: str) -> Dict[str, Any]:
         }
         
         # Try to get archive count
-        archives_result = await borgmatic.list_archives(path)
         if archives_result["success"]:
             try:
                 archives_data = archives_result["stdout"]
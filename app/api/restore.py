@@ -1,15 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, undefer
 from pydantic import BaseModel
+from datetime import datetime
+import asyncio
+import orjson
 import structlog
-from typing import List
+from typing import Any, Dict, List
+from uuid import uuid4
 
-from app.database.models import User
+from app.database.database import get_db, SessionLocal
+from app.database.models import User, RestoreJob
 from app.core.security import get_current_user
 from app.core.borgmatic import borgmatic
+from app.config import settings
 
 logger = structlog.get_logger()
 router = APIRouter()
 
+# Running restore tasks by job id, so they aren't garbage collected. Job state itself
+# lives in the restore_jobs table, so any worker process can answer a status poll.
+_restore_tasks: Dict[str, asyncio.Task] = {}
+
 class RestoreRequest(BaseModel):
     repository: str
     archive: str
@@ -17,46 +30,106 @@ class RestoreRequest(BaseModel):
     destination: str
     dry_run: bool = False
 
-@router.post("/preview")
-async def preview_restore(
-    restore_request: RestoreRequest,
-    current_user: User = Depends(get_current_user)
-):
-    """Preview a restore operation"""
+def _record_restore_outcome(job_id: str, outcome: Dict[str, Any]) -> None:
+    """Store the final state of a restore job"""
+    db = SessionLocal()
     try:
-        result = await borgmatic.extract_archive(
+        db.execute(
+            update(RestoreJob)
+            .where(RestoreJob.id == job_id)
+            .values(completed_at=datetime.utcnow(), **outcome)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+async def _run_restore_job(job_id: str, restore_request: RestoreRequest, dry_run: bool):
+    """Run an extract and record its outcome"""
+    try:
+        result = await borgmatic.extract_archive_parallel(
             restore_request.repository,
             restore_request.archive,
             restore_request.paths,
             restore_request.destination,
-            dry_run=True
+            dry_run=dry_run,
+            concurrency=settings.restore_concurrency
         )
-        return {"preview": result["stdout"]}
+        outcome = {
+            "status": "completed" if result["success"] else "failed",
+            "result": orjson.dumps(result).decode()
+        }
+    except asyncio.CancelledError:
+        _record_restore_outcome(job_id, {"status": "failed", "error_message": "Restore was cancelled"})
+        raise
     except Exception as e:
-        logger.error("Failed to preview restore", error=str(e))
+        logger.error("Restore job failed", job_id=job_id, error=str(e))
+        outcome = {"status": "failed", "error_message": str(e)}
+
+    try:
+        await asyncio.to_thread(_record_restore_outcome, job_id, outcome)
+    except SQLAlchemyError as e:
+        logger.error("Failed to record restore outcome", job_id=job_id, error=str(e))
+
+def _submit_restore(restore_request: RestoreRequest, dry_run: bool, db: Session) -> str:
+    """Record a restore job and start its extract in the background"""
+    job_id = uuid4().hex
+    try:
+        db.add(RestoreJob(
+            id=job_id,
+            repository=restore_request.repository,
+            archive=restore_request.archive,
+            dry_run=dry_run,
+            status="running"
+        ))
+        db.commit()
+    except SQLAlchemyError as e:
+        logger.error("Failed to start restore", error=str(e))
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to preview restore"
+            detail="Failed to start restore"
         )
 
+    task = asyncio.create_task(_run_restore_job(job_id, restore_request, dry_run))
+    _restore_tasks[job_id] = task
+    task.add_done_callback(lambda _, job_id=job_id: _restore_tasks.pop(job_id, None))
+    return job_id
+
+@router.post("/preview")
+async def preview_restore(
+    restore_request: RestoreRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Preview a restore operation in the background"""
+    job_id = _submit_restore(restore_request, dry_run=True, db=db)
+    logger.info("Restore preview started", job_id=job_id, user=current_user.username)
+    return {"job_id": job_id, "status": "running"}
+
 @router.post("/start")
 async def start_restore(
     restore_request: RestoreRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
-    """Start a restore operation"""
-    try:
-        result = await borgmatic.extract_archive(
-            restore_request.repository,
-            restore_request.archive,
-            restore_request.paths,
-            restore_request.destination,
-            dry_run=False
-        )
-        return {"message": "Restore completed successfully"}
-    except Exception as e:
-        logger.error("Failed to start restore", error=str(e))
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to start restore"
-        ) 
\ No newline at end of file
+    """Start a restore operation in the background"""
+    job_id = _submit_restore(restore_request, dry_run=False, db=db)
+    logger.info("Restore started", job_id=job_id, user=current_user.username)
+    return {"message": "Restore started", "job_id": job_id, "status": "running"}
+
+@router.get("/{job_id}")
+async def get_restore_status(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the status, and once finished the result, of a restore job"""
+    job = db.query(RestoreJob).options(undefer(RestoreJob.result)).filter(RestoreJob.id == job_id).first()
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Restore job not found")
+
+    response = {"job_id": job.id, "status": job.status}
+    if job.error_message is not None:
+        response["error"] = job.error_message
+    if job.result is not None:
+        response["result"] = orjson.loads(job.result)
+    return response
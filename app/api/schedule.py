@@ -1,25 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse, Response
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 import structlog
-import croniter
 import json
+import orjson
 import os
 import asyncio
 
-from app.database.database import get_db
-from app.database.models import User
+from app.database.database import get_db, SessionLocal
+from app.database.models import User, ScheduledJob
 from app.core.security import get_current_user
-from app.core.borgmatic import BorgmaticInterface
+from app.core.borgmatic import borgmatic
+from app.core.cron import croniter, describe_cron, next_n, validate_cron
 from app.config import settings
 
 logger = structlog.get_logger()
 router = APIRouter(tags=["schedule"])
 
-# Initialize Borgmatic interface
-borgmatic = BorgmaticInterface()
-
 # Pydantic models
 from pydantic import BaseModel
 
@@ -46,6 +47,78 @@ class CronExpression(BaseModel):
     month: str = "*"
     day_of_week: str = "*"
 
+# Common cron expression presets
+CRON_PRESETS = [
+    {
+        "name": "Every Minute",
+        "expression": "* * * * *",
+        "description": "Run every minute"
+    },
+    {
+        "name": "Every 5 Minutes",
+        "expression": "*/5 * * * *",
+        "description": "Run every 5 minutes"
+    },
+    {
+        "name": "Every 15 Minutes",
+        "expression": "*/15 * * * *",
+        "description": "Run every 15 minutes"
+    },
+    {
+        "name": "Every Hour",
+        "expression": "0 * * * *",
+        "description": "Run every hour"
+    },
+    {
+        "name": "Every 6 Hours",
+        "expression": "0 */6 * * *",
+        "description": "Run every 6 hours"
+    },
+    {
+        "name": "Daily at Midnight",
+        "expression": "0 0 * * *",
+        "description": "Run daily at midnight"
+    },
+    {
+        "name": "Daily at 2 AM",
+        "expression": "0 2 * * *",
+        "description": "Run daily at 2 AM"
+    },
+    {
+        "name": "Weekly on Sunday",
+        "expression": "0 0 * * 0",
+        "description": "Run weekly on Sunday at midnight"
+    },
+    {
+        "name": "Monthly on 1st",
+        "expression": "0 0 1 * *",
+        "description": "Run monthly on the 1st at midnight"
+    },
+    {
+        "name": "Weekdays at 9 AM",
+        "expression": "0 9 * * 1-5",
+        "description": "Run weekdays at 9 AM"
+    },
+    {
+        "name": "Weekends at 6 AM",
+        "expression": "0 6 * * 0,6",
+        "description": "Run weekends at 6 AM"
+    }
+]
+
+# Parse and describe the presets once up front: validating or previewing one
+# later is a cache hit, and a broken preset fails at import instead of on a
+# user's request
+for preset in CRON_PRESETS:
+    validate_cron(preset["expression"])
+    describe_cron(preset["expression"])
+
+# The presets never change, so encode the response once
+_CRON_PRESETS_PAYLOAD = orjson.dumps({
+    "success": True,
+    "presets": CRON_PRESETS
+})
+
 @router.get("/")
 async def get_scheduled_jobs(
     current_user: User = Depends(get_current_user),
@@ -53,25 +126,27 @@ async def get_scheduled_jobs(
 ):
     """Get all scheduled jobs"""
     try:
-        jobs = db.query(ScheduledJob).all()
-        return {
+        # Select just the returned columns: plain rows skip the ORM identity map
+        # and attribute instrumentation, and are streamed in batches
+        stmt = select(
+            ScheduledJob.id,
+            ScheduledJob.name,
+            ScheduledJob.cron_expression,
+            ScheduledJob.repository,
+            ScheduledJob.enabled,
+            ScheduledJob.last_run,
+            ScheduledJob.next_run,
+            ScheduledJob.created_at,
+            ScheduledJob.updated_at,
+            ScheduledJob.description
+        ).execution_options(yield_per=200)
+        
+        # orjson writes datetimes in the same ISO format isoformat() would, so
+        # pass them through as-is and skip FastAPI's jsonable_encoder pass
+        return ORJSONResponse({
             "success": True,
-            "jobs": [
-                {
-                    "id": job.id,
-                    "name": job.name,
-                    "cron_expression": job.cron_expression,
-                    "repository": job.repository,
-                    "enabled": job.enabled,
-                    "last_run": job.last_run.isoformat() if job.last_run else None,
-                    "next_run": job.next_run.isoformat() if job.next_run else None,
-                    "created_at": job.created_at.isoformat(),
-                    "updated_at": job.updated_at.isoformat() if job.updated_at else None,
-                    "description": job.description
-                }
-                for job in jobs
-            ]
-        }
+            "jobs": [dict(row) for row in db.execute(stmt).mappings()]
+        })
     except Exception as e:
         logger.error("Failed to get scheduled jobs", error=str(e))
         raise HTTPException(status_code=500, detail=f"Failed to retrieve scheduled jobs: {str(e)}")
@@ -89,16 +164,11 @@ async def create_scheduled_job(
     try:
         # Validate cron expression
         try:
-            cron = croniter.croniter(job_data.cron_expression, datetime.now())
-            next_run = cron.get_next(datetime)
+            validate_cron(job_data.cron_expression)
+            next_run = _compute_next(job_data.cron_expression, datetime.now())
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Invalid cron expression: {str(e)}")
         
-        # Check if job name already exists
-        existing_job = db.query(ScheduledJob).filter(ScheduledJob.name == job_data.name).first()
-        if existing_job:
-            raise HTTPException(status_code=400, detail="Job name already exists")
-        
         # Create scheduled job
         scheduled_job = ScheduledJob(
             name=job_data.name,
@@ -111,12 +181,18 @@ async def create_scheduled_job(
         )
         
         db.add(scheduled_job)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # Job names are unique in the schema
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Job name already exists")
         db.refresh(scheduled_job)
+        _wake_scheduler()
         
         logger.info("Scheduled job created", name=job_data.name, user=current_user.username)
         
-        return {
+        return ORJSONResponse({
             "success": True,
             "message": "Scheduled job created successfully",
             "job": {
@@ -125,9 +201,9 @@ async def create_scheduled_job(
                 "cron_expression": scheduled_job.cron_expression,
                 "repository": scheduled_job.repository,
                 "enabled": scheduled_job.enabled,
-                "next_run": scheduled_job.next_run.isoformat() if scheduled_job.next_run else None
+                "next_run": scheduled_job.next_run
             }
-        }
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -137,68 +213,38 @@ async def create_scheduled_job(
 @router.get("/cron-presets")
 async def get_cron_presets(current_user: User = Depends(get_current_user)):
     """Get common cron expression presets"""
-    presets = [
-        {
-            "name": "Every Minute",
-            "expression": "* * * * *",
-            "description": "Run every minute"
-        },
-        {
-            "name": "Every 5 Minutes",
-            "expression": "*/5 * * * *",
-            "description": "Run every 5 minutes"
-        },
-        {
-            "name": "Every 15 Minutes",
-            "expression": "*/15 * * * *",
-            "description": "Run every 15 minutes"
-        },
-        {
-            "name": "Every Hour",
-            "expression": "0 * * * *",
-            "description": "Run every hour"
-        },
-        {
-            "name": "Every 6 Hours",
-            "expression": "0 */6 * * *",
-            "description": "Run every 6 hours"
-        },
-        {
-            "name": "Daily at Midnight",
-            "expression": "0 0 * * *",
-            "description": "Run daily at midnight"
-        },
-        {
-            "name": "Daily at 2 AM",
-            "expression": "0 2 * * *",
-            "description": "Run daily at 2 AM"
-        },
-        {
-            "name": "Weekly on Sunday",
-            "expression": "0 0 * * 0",
-            "description": "Run weekly on Sunday at midnight"
-        },
-        {
-            "name": "Monthly on 1st",
-            "expression": "0 0 1 * *",
-            "description": "Run monthly on the 1st at midnight"
-        },
-        {
-            "name": "Weekdays at 9 AM",
-            "expression": "0 9 * * 1-5",
-            "description": "Run weekdays at 9 AM"
-        },
-        {
-            "name": "Weekends at 6 AM",
-            "expression": "0 6 * * 0,6",
-            "description": "Run weekends at 6 AM"
-        }
-    ]
+    return Response(content=_CRON_PRESETS_PAYLOAD, media_type="application/json")
+
+def _compute_next(cron_expr: str, now: datetime) -> datetime:
+    """Next run time of a cron expression after `now`"""
+    return croniter(cron_expr, now).get_next(datetime)
+
+def _collect_upcoming_jobs(jobs: List[Any], now: datetime, end_time: datetime) -> List[Dict[str, Any]]:
+    """Jobs due by `end_time`, soonest first, recomputing next runs that are already past"""
+    upcoming_jobs = []
+    stale = False
     
-    return {
-        "success": True,
-        "presets": presets
-    }
+    for job in jobs:
+        next_run = job.next_run
+        # A missed tick leaves next_run in the past; work out the real next run
+        if next_run < now:
+            next_run = _compute_next(job.cron_expression, now)
+            if next_run > end_time:
+                continue
+            stale = True
+        
+        upcoming_jobs.append({
+            "id": job.id,
+            "name": job.name,
+            "repository": job.repository,
+            "next_run": next_run,
+            "cron_expression": job.cron_expression
+        })
+    
+    # Rows arrive ordered by stored next_run; only recomputed ones can be out of place
+    if stale:
+        upcoming_jobs.sort(key=lambda x: x["next_run"])
+    return upcoming_jobs
 
 @router.get("/upcoming-jobs")
 async def get_upcoming_jobs(
@@ -208,35 +254,33 @@ async def get_upcoming_jobs(
 ):
     """Get upcoming scheduled jobs"""
     try:
-        jobs = db.query(ScheduledJob).filter(ScheduledJob.enabled == True).all()
-        upcoming_jobs = []
-        
-        end_time = datetime.now() + timedelta(hours=hours)
-        
-        for job in jobs:
-            try:
-                cron = croniter.croniter(job.cron_expression, datetime.now())
-                next_run = cron.get_next(datetime)
-                
-                if next_run <= end_time:
-                    upcoming_jobs.append({
-                        "id": job.id,
-                        "name": job.name,
-                        "repository": job.repository,
-                        "next_run": next_run.isoformat(),
-                        "cron_expression": job.cron_expression
-                    })
-            except:
-                continue
-        
-        # Sort by next run time
-        upcoming_jobs.sort(key=lambda x: x["next_run"])
-        
-        return {
+        now = datetime.now()
+        end_time = now + timedelta(hours=hours)
+        
+        # The stored next_run already answers "is it due in the window" for
+        # every job the scheduler has kept up to date, so filter in SQL
+        jobs = db.execute(
+            select(
+                ScheduledJob.id,
+                ScheduledJob.name,
+                ScheduledJob.repository,
+                ScheduledJob.cron_expression,
+                ScheduledJob.next_run
+            ).where(
+                ScheduledJob.enabled.is_(True),
+                ScheduledJob.next_run.is_not(None),
+                ScheduledJob.next_run <= end_time
+            ).order_by(ScheduledJob.next_run)
+        ).all()
+        
+        # Recompute stale next runs in a worker thread, off the event loop
+        upcoming_jobs = await asyncio.to_thread(_collect_upcoming_jobs, jobs, now, end_time)
+        
+        return ORJSONResponse({
             "success": True,
             "upcoming_jobs": upcoming_jobs,
             "hours_ahead": hours
-        }
+        })
     except Exception as e:
         logger.error("Failed to get upcoming jobs", error=str(e))
         raise HTTPException(status_code=500, detail=f"Failed to get upcoming jobs: {str(e)}")
@@ -255,14 +299,11 @@ async def get_scheduled_job(
         
         # Calculate next run times
         try:
-            cron = croniter.croniter(job.cron_expression, datetime.now())
-            next_runs = []
-            for i in range(5):  # Get next 5 run times
-                next_runs.append(cron.get_next(datetime).isoformat())
+            next_runs = next_n(job.cron_expression, 5)  # Get next 5 run times
         except:
             next_runs = []
         
-        return {
+        return ORJSONResponse({
             "success": True,
             "job": {
                 "id": job.id,
@@ -271,14 +312,14 @@ async def get_scheduled_job(
                 "repository": job.repository,
                 "config_file": job.config_file,
                 "enabled": job.enabled,
-                "last_run": job.last_run.isoformat() if job.last_run else None,
-                "next_run": job.next_run.isoformat() if job.next_run else None,
+                "last_run": job.last_run,
+                "next_run": job.next_run,
                 "next_runs": next_runs,
-                "created_at": job.created_at.isoformat(),
-                "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+                "created_at": job.created_at,
+                "updated_at": job.updated_at,
                 "description": job.description
             }
-        }
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -303,21 +344,14 @@ async def update_scheduled_job(
         
         # Update fields
         if job_data.name is not None:
-            # Check if name already exists
-            existing_job = db.query(ScheduledJob).filter(
-                ScheduledJob.name == job_data.name,
-                ScheduledJob.id != job_id
-            ).first()
-            if existing_job:
-                raise HTTPException(status_code=400, detail="Job name already exists")
             job.name = job_data.name
         
         if job_data.cron_expression is not None:
             # Validate cron expression
             try:
-                cron = croniter.croniter(job_data.cron_expression, datetime.now())
+                validate_cron(job_data.cron_expression)
+                job.next_run = _compute_next(job_data.cron_expression, datetime.now())
                 job.cron_expression = job_data.cron_expression
-                job.next_run = cron.get_next(datetime)
             except Exception as e:
                 raise HTTPException(status_code=400, detail=f"Invalid cron expression: {str(e)}")
         
@@ -334,7 +368,13 @@ async def update_scheduled_job(
             job.description = job_data.description
         
         job.updated_at = datetime.utcnow()
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # Job names are unique in the schema
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Job name already exists")
+        _wake_scheduler()
         
         logger.info("Scheduled job updated", job_id=job_id, user=current_user.username)
         
@@ -396,6 +436,7 @@ async def toggle_scheduled_job(
         job.enabled = not job.enabled
         job.updated_at = datetime.utcnow()
         db.commit()
+        _wake_scheduler()
         
         logger.info("Scheduled job toggled", job_id=job_id, enabled=job.enabled, user=current_user.username)
         
@@ -459,9 +500,9 @@ async def validate_cron_expression(
         # Build cron expression
         cron_expr = f"{cron_data.minute} {cron_data.hour} {cron_data.day_of_month} {cron_data.month} {cron_data.day_of_week}"
         
-        # Validate cron expression
+        # Validate cron expression and get next 10 run times
         try:
-            cron = croniter.croniter(cron_expr, datetime.now())
+            next_runs = next_n(cron_expr, 10)
         except Exception as e:
             return {
                 "success": False,
@@ -469,63 +510,105 @@ async def validate_cron_expression(
                 "cron_expression": cron_expr
             }
         
-        # Get next 10 run times
-        next_runs = []
-        for i in range(10):
-            next_runs.append(cron.get_next(datetime).isoformat())
-        
         return {
             "success": True,
             "cron_expression": cron_expr,
             "next_runs": next_runs,
-            "description": croniter.croniter(cron_expr).description
+            "description": describe_cron(cron_expr)
         }
     except Exception as e:
         logger.error("Failed to validate cron expression", error=str(e))
         raise HTTPException(status_code=500, detail=f"Failed to validate cron expression: {str(e)}")
 
+# Longest the scheduler sleeps between checks, so new or edited jobs are picked up
+SCHEDULER_MAX_SLEEP = 60
+
+# Most scheduled backups run at the same time
+SCHEDULER_CONCURRENCY = 4
+
+# Set to wake the scheduler early; created by the scheduler so it belongs to the running loop
+_scheduler_wakeup: Optional[asyncio.Event] = None
+
+def _wake_scheduler():
+    """Make the scheduler re-check its jobs now instead of at the end of its sleep"""
+    if _scheduler_wakeup is not None:
+        _scheduler_wakeup.set()
+
 # Background task to check and run scheduled jobs
 async def check_scheduled_jobs():
     """Check and execute scheduled jobs"""
+    global _scheduler_wakeup
+    _scheduler_wakeup = asyncio.Event()
+    
     while True:
+        delay = SCHEDULER_MAX_SLEEP
         try:
-            db = next(get_db())
-            jobs = db.query(ScheduledJob).filter(
-                ScheduledJob.enabled == True,
-                ScheduledJob.next_run <= datetime.now()
-            ).all()
-            
-            for job in jobs:
-                try:
-                    logger.info("Running scheduled job", job_id=job.id, name=job.name)
-                    
-                    # Execute backup
-                    result = await borgmatic.run_backup(
-                        repository=job.repository,
-                        config_file=job.config_file
+            with SessionLocal() as db:
+                jobs = db.execute(
+                    select(
+                        ScheduledJob.id,
+                        ScheduledJob.name,
+                        ScheduledJob.cron_expression,
+                        ScheduledJob.repository,
+                        ScheduledJob.config_file
+                    ).where(
+                        ScheduledJob.enabled.is_(True),
+                        ScheduledJob.next_run <= datetime.now()
                     )
+                ).all()
+            
+            # Run due jobs concurrently, but cap the number of borg processes at once
+            semaphore = asyncio.Semaphore(SCHEDULER_CONCURRENCY)
+            
+            async def run_job(job):
+                async with semaphore:
+                    finished = False
+                    try:
+                        logger.info("Running scheduled job", job_id=job.id, name=job.name)
+                        
+                        # Execute backup
+                        result = await borgmatic.run_backup(
+                            repository=job.repository,
+                            config_file=job.config_file
+                        )
+                        finished = True
+                        
+                        logger.info("Scheduled job completed", job_id=job.id, name=job.name, success=result["success"])
+                        
+                    except Exception as e:
+                        logger.error("Failed to run scheduled job", job_id=job.id, error=str(e))
                     
-                    # Update job status
-                    job.last_run = datetime.now()
-                    
-                    # Calculate next run time
-                    cron = croniter.croniter(job.cron_expression, datetime.now())
-                    job.next_run = cron.get_next(datetime)
-                    
-                    db.commit()
-                    
-                    logger.info("Scheduled job completed", job_id=job.id, name=job.name, success=result["success"])
-                    
-                except Exception as e:
-                    logger.error("Failed to run scheduled job", job_id=job.id, error=str(e))
-                    # Update last run time even if failed
-                    job.last_run = datetime.now()
-                    db.commit()
+                    # Record the run in its own short transaction, which rolls back on error
+                    with SessionLocal() as db, db.begin():
+                        scheduled_job = db.get(ScheduledJob, job.id)
+                        if scheduled_job is None:
+                            return
+                        
+                        # Update last run time even if failed
+                        scheduled_job.last_run = datetime.now()
+                        if finished:
+                            scheduled_job.next_run = _compute_next(job.cron_expression, datetime.now())
             
-            db.close()
+            await asyncio.gather(*(run_job(job) for job in jobs), return_exceptions=True)
+            
+            # Sleep until the next job is due instead of polling on a fixed interval
+            now = datetime.now()
+            with SessionLocal() as db:
+                next_due = db.execute(
+                    select(func.min(ScheduledJob.next_run)).where(
+                        ScheduledJob.enabled.is_(True),
+                        ScheduledJob.next_run > now
+                    )
+                ).scalar()
+            if next_due is not None:
+                delay = min(max((next_due - now).total_seconds(), 1), SCHEDULER_MAX_SLEEP)
             
         except Exception as e:
             logger.error("Error in scheduled job checker", error=str(e))
         
-        # Wait for 1 minute before next check
-        await asyncio.sleep(60) 
\ No newline at end of file
+        # Sleep until the next job is due, or until a job is created or changed
+        try:
+            await asyncio.wait_for(_scheduler_wakeup.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+        _scheduler_wakeup.clear()
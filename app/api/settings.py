@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 import structlog
+import time
 
 from app.database.database import get_db
-from app.database.models import User
-from app.core.security import get_current_user, get_password_hash, verify_password
+from app.database.models import User, SystemSettings
+from app.core.security import get_current_user, get_current_admin_user, hash_password_async, verify_password_async, invalidate_user_cache
 from app.core.borgmatic import BorgmaticInterface
 from app.config import settings as app_settings
 
@@ -35,6 +38,38 @@ class PasswordChange(BaseModel):
     current_password: str
     new_password: str
 
+# The system settings row only changes through PUT /system, so reads are served
+# from an in-process copy. Other workers see an update once their copy expires.
+SYSTEM_SETTINGS_TTL = 30
+SYSTEM_SETTINGS_FIELDS = (
+    "backup_timeout",
+    "max_concurrent_backups",
+    "log_retention_days",
+    "email_notifications",
+    "webhook_url",
+    "auto_cleanup",
+    "cleanup_retention_days"
+)
+_settings_cache: Dict[str, Any] = {"value": None, "expires": 0.0}
+
+def get_cached_settings(db: Session) -> Dict[str, Any]:
+    """Current system settings, created with defaults on first use"""
+    if _settings_cache["value"] is not None and time.monotonic() < _settings_cache["expires"]:
+        return _settings_cache["value"]
+    
+    settings = db.query(SystemSettings).first()
+    if not settings:
+        # Create default settings
+        settings = SystemSettings()
+        db.add(settings)
+        db.commit()
+        db.refresh(settings)
+    
+    value = {field: getattr(settings, field) for field in SYSTEM_SETTINGS_FIELDS}
+    _settings_cache["value"] = value
+    _settings_cache["expires"] = time.monotonic() + SYSTEM_SETTINGS_TTL
+    return value
+
 class SystemSettingsUpdate(BaseModel):
     backup_timeout: Optional[int] = None
     max_concurrent_backups: Optional[int] = None
@@ -44,6 +79,15 @@ class SystemSettingsUpdate(BaseModel):
     auto_cleanup: Optional[bool] = None
     cleanup_retention_days: Optional[int] = None
 
+def _unique_violation_detail(error: IntegrityError) -> str:
+    """Describe which unique user column an IntegrityError tripped over"""
+    message = str(error.orig).lower()
+    if "email" in message:
+        return "Email already exists"
+    if "username" in message:
+        return "Username already exists"
+    return "Username or email already exists"
+
 @router.get("/system")
 async def get_system_settings(
     current_user: User = Depends(get_current_user),
@@ -51,34 +95,14 @@ async def get_system_settings(
 ):
     """Get system settings"""
     try:
-        # Get settings from database or use defaults
-        settings = db.query(SystemSettings).first()
-        if not settings:
-            # Create default settings
-            settings = SystemSettings(
-                backup_timeout=3600,
-                max_concurrent_backups=2,
-                log_retention_days=30,
-                email_notifications=False,
-                webhook_url="",
-                auto_cleanup=True,
-                cleanup_retention_days=90
-            )
-            db.add(settings)
-            db.commit()
-            db.refresh(settings)
+        # Get settings from the cache, the database or defaults
+        settings = get_cached_settings(db)
         
         return {
             "success": True,
             "settings": {
-                "backup_timeout": settings.backup_timeout,
-                "max_concurrent_backups": settings.max_concurrent_backups,
-                "log_retention_days": settings.log_retention_days,
-                "email_notifications": settings.email_notifications,
-                "webhook_url": settings.webhook_url,
-                "auto_cleanup": settings.auto_cleanup,
-                "cleanup_retention_days": settings.cleanup_retention_days,
-                "borgmatic_version": borgmatic.get_version(),
+                **settings,
+                "borgmatic_version": await borgmatic.get_version(),
                 "app_version": "1.0.0"
             }
         }
@@ -89,13 +113,10 @@ async def get_system_settings(
 @router.put("/system")
 async def update_system_settings(
     settings_update: SystemSettingsUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """Update system settings (admin only)"""
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
     try:
         settings = db.query(SystemSettings).first()
         if not settings:
@@ -120,6 +141,7 @@ async def update_system_settings(
         
         settings.updated_at = datetime.utcnow()
         db.commit()
+        _settings_cache["expires"] = 0.0
         
         logger.info("System settings updated", user=current_user.username)
         
@@ -133,29 +155,26 @@ async def update_system_settings(
 
 @router.get("/users")
 async def get_users(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """Get all users (admin only)"""
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
     try:
-        users = db.query(User).all()
+        # Select only the listed columns (never password_hash) as plain rows,
+        # skipping ORM instances and the identity map
+        stmt = select(
+            User.id,
+            User.username,
+            User.email,
+            User.is_active,
+            User.is_admin,
+            User.created_at,
+            User.last_login
+        ).execution_options(yield_per=200)
+        
         return {
             "success": True,
-            "users": [
-                {
-                    "id": user.id,
-                    "username": user.username,
-                    "email": user.email,
-                    "is_active": user.is_active,
-                    "is_admin": user.is_admin,
-                    "created_at": user.created_at,
-                    "last_login": user.last_login
-                }
-                for user in users
-            ]
+            "users": [dict(row) for row in db.execute(stmt).mappings()]
         }
     except Exception as e:
         logger.error("Failed to get users", error=str(e))
@@ -164,26 +183,13 @@ async def get_users(
 @router.post("/users")
 async def create_user(
     user_data: UserCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """Create a new user (admin only)"""
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
     try:
-        # Check if username already exists
-        existing_user = db.query(User).filter(User.username == user_data.username).first()
-        if existing_user:
-            raise HTTPException(status_code=400, detail="Username already exists")
-        
-        # Check if email already exists
-        existing_email = db.query(User).filter(User.email == user_data.email).first()
-        if existing_email:
-            raise HTTPException(status_code=400, detail="Email already exists")
-        
         # Create new user
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await hash_password_async(user_data.password)
         new_user = User(
             username=user_data.username,
             email=user_data.email,
@@ -193,7 +199,12 @@ async def create_user(
         )
         
         db.add(new_user)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError as e:
+            # Usernames and emails are unique in the schema
+            db.rollback()
+            raise HTTPException(status_code=400, detail=_unique_violation_detail(e))
         db.refresh(new_user)
         
         logger.info("User created", username=user_data.username, created_by=current_user.username)
@@ -219,37 +230,20 @@ async def create_user(
 async def update_user(
     user_id: int,
     user_data: UserUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """Update user (admin only)"""
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
     try:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = db.get(User, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
         # Update user fields
         if user_data.username is not None:
-            # Check if username already exists
-            existing_user = db.query(User).filter(
-                User.username == user_data.username,
-                User.id != user_id
-            ).first()
-            if existing_user:
-                raise HTTPException(status_code=400, detail="Username already exists")
             user.username = user_data.username
         
         if user_data.email is not None:
-            # Check if email already exists
-            existing_email = db.query(User).filter(
-                User.email == user_data.email,
-                User.id != user_id
-            ).first()
-            if existing_email:
-                raise HTTPException(status_code=400, detail="Email already exists")
             user.email = user_data.email
         
         if user_data.is_active is not None:
@@ -259,7 +253,13 @@ async def update_user(
             user.is_admin = user_data.is_admin
         
         user.updated_at = datetime.utcnow()
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError as e:
+            # Usernames and emails are unique in the schema
+            db.rollback()
+            raise HTTPException(status_code=400, detail=_unique_violation_detail(e))
+        invalidate_user_cache(user_id)
         
         logger.info("User updated", user_id=user_id, updated_by=current_user.username)
         
@@ -276,21 +276,23 @@ async def update_user(
 @router.delete("/users/{user_id}")
 async def delete_user(
     user_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """Delete user (admin only)"""
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
     try:
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
+        # Fetch the user and the number of admins in one round-trip; the count
+        # subquery is uncorrelated so it counts every admin, not just this row
+        admin_count = select(func.count(User.id)).where(
+            User.is_admin.is_(True)
+        ).correlate(None).scalar_subquery()
+        row = db.query(User, admin_count).filter(User.id == user_id).first()
+        if not row:
             raise HTTPException(status_code=404, detail="User not found")
+        user, admin_count = row
         
         # Prevent deleting the last admin user
         if user.is_admin:
-            admin_count = db.query(User).filter(User.is_admin == True).count()
             if admin_count <= 1:
                 raise HTTPException(status_code=400, detail="Cannot delete the last admin user")
         
@@ -300,6 +302,7 @@ async def delete_user(
         
         db.delete(user)
         db.commit()
+        invalidate_user_cache(user_id)
         
         logger.info("User deleted", user_id=user_id, deleted_by=current_user.username)
         
@@ -317,22 +320,20 @@ async def delete_user(
 async def reset_user_password(
     user_id: int,
     new_password: str,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """Reset user password (admin only)"""
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
     try:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = db.get(User, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        hashed_password = get_password_hash(new_password)
+        hashed_password = await hash_password_async(new_password)
         user.password_hash = hashed_password
         user.updated_at = datetime.utcnow()
         db.commit()
+        invalidate_user_cache(user_id)
         
         logger.info("User password reset", user_id=user_id, reset_by=current_user.username)
         
@@ -353,14 +354,15 @@ async def change_password(
     """Change current user's password"""
     try:
         # Verify current password
-        if not verify_password(password_data.current_password, current_user.password_hash):
+        if not await verify_password_async(password_data.current_password, current_user.password_hash):
             raise HTTPException(status_code=400, detail="Current password is incorrect")
         
         # Update password
-        hashed_password = get_password_hash(password_data.new_password)
+        hashed_password = await hash_password_async(password_data.new_password)
         current_user.password_hash = hashed_password
         current_user.updated_at = datetime.utcnow()
         db.commit()
+        invalidate_user_cache(current_user.id)
         
         logger.info("Password changed", username=current_user.username)
         
@@ -400,27 +402,19 @@ async def update_profile(
     try:
         # Update user fields
         if profile_data.username is not None:
-            # Check if username already exists
-            existing_user = db.query(User).filter(
-                User.username == profile_data.username,
-                User.id != current_user.id
-            ).first()
-            if existing_user:
-                raise HTTPException(status_code=400, detail="Username already exists")
             current_user.username = profile_data.username
         
         if profile_data.email is not None:
-            # Check if email already exists
-            existing_email = db.query(User).filter(
-                User.email == profile_data.email,
-                User.id != current_user.id
-            ).first()
-            if existing_email:
-                raise HTTPException(status_code=400, detail="Email already exists")
             current_user.email = profile_data.email
         
         current_user.updated_at = datetime.utcnow()
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError as e:
+            # Usernames and emails are unique in the schema
+            db.rollback()
+            raise HTTPException(status_code=400, detail=_unique_violation_detail(e))
+        invalidate_user_cache(current_user.id)
         
         logger.info("Profile updated", username=current_user.username)
         
@@ -436,30 +430,13 @@ async def update_profile(
 
 @router.post("/system/cleanup")
 async def cleanup_system(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """Run system cleanup (admin only)"""
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
     try:
-        # Get system settings
-        settings = db.query(SystemSettings).first()
-        if not settings:
-            # Create default settings if they don't exist
-            settings = SystemSettings(
-                backup_timeout=3600,
-                max_concurrent_backups=2,
-                log_retention_days=30,
-                email_notifications=False,
-                webhook_url="",
-                auto_cleanup=True,
-                cleanup_retention_days=90
-            )
-            db.add(settings)
-            db.commit()
-            db.refresh(settings)
+        # Get system settings (created with defaults if they don't exist)
+        settings = get_cached_settings(db)
         
         # Perform cleanup tasks (placeholder implementation)
         cleanup_results = {
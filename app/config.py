@@ -17,6 +17,10 @@ class Settings(BaseSettings):
     
     # Database settings
     database_url: str = "sqlite:///./borgmatic.db"
+    db_pool_size: int = 20
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 10  # Seconds to wait for a free connection
+    db_pool_recycle: int = 3600  # Seconds before a pooled connection is replaced
     
     # Borgmatic settings
     borgmatic_config_path: str = "/app/config/borgmatic.yaml"
@@ -41,6 +45,7 @@ class Settings(BaseSettings):
     # Backup settings
     max_backup_jobs: int = 5
     backup_timeout: int = 3600  # 1 hour
+    restore_concurrency: int = 4  # Parallel extracts per multi-path restore
     
     # Health check settings
     health_check_interval: int = 30
@@ -4,19 +4,32 @@ import json
 import yaml
 import os
 import re
+import signal
 import structlog
-from typing import Dict, List, Optional, Tuple
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 from app.config import settings
 
 logger = structlog.get_logger()
 
+# Prefer the libyaml-backed loader/dumper when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YamlSafeLoader, CSafeDumper as YamlSafeDumper
+except ImportError:
+    from yaml import SafeLoader as YamlSafeLoader, SafeDumper as YamlSafeDumper
+
 class BorgmaticInterface:
     """Interface for interacting with Borgmatic CLI"""
     
     def __init__(self, config_path: str = None):
         self.config_path = config_path or settings.borgmatic_config_path
         self.borgmatic_cmd = "borgmatic"
+        # Parsed configuration per path, keyed on (mtime_ns, size) of the file
+        self._config_cache: Dict[str, Tuple[Tuple[int, int], Dict, str]] = {}
+        # The installed version can't change under a running process, so it is
+        # read once (by the installation check) and reused
+        self._version: Optional[str] = None
         self._validate_borgmatic_installation()
     
     def _validate_path(self, path: str) -> bool:
@@ -54,23 +67,43 @@ class BorgmaticInterface:
             result = subprocess.run([self.borgmatic_cmd, "--version"], 
                                   capture_output=True, text=True, timeout=10)
             if result.returncode == 0:
-                logger.info("Borgmatic found", version=result.stdout.strip())
+                self._version = result.stdout.strip()
+                logger.info("Borgmatic found", version=self._version)
             else:
                 raise RuntimeError(f"Borgmatic command failed with return code {result.returncode}")
         except (subprocess.TimeoutExpired, FileNotFoundError) as e:
             logger.error("Borgmatic not available", error=str(e))
             raise RuntimeError(f"Borgmatic not available: {str(e)}")
     
+    async def _stop_process(self, process: asyncio.subprocess.Process, grace: float = 10) -> None:
+        """Terminate a command and its children (borgmatic runs borg), killing them if they linger"""
+        if process.returncode is not None:
+            return
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            await asyncio.wait_for(process.wait(), timeout=grace)
+        except ProcessLookupError:
+            pass
+        except asyncio.TimeoutError:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+    
     async def _execute_command(self, cmd: List[str], timeout: int = 3600, env: Dict = None) -> Dict:
         """Execute a command with real-time output capture"""
         logger.info("Executing command", command=" ".join(cmd))
         
+        process = None
         try:
+            # Own process group, so a timeout or cancellation can stop borg too
             process = await asyncio.create_subprocess_exec(
                 *cmd,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
-                env=env or os.environ
+                env=env or os.environ,
+                start_new_session=True
             )
             
             stdout, stderr = await asyncio.wait_for(
@@ -97,12 +130,18 @@ class BorgmaticInterface:
             
         except asyncio.TimeoutError:
             logger.error("Command timed out", command=" ".join(cmd), timeout=timeout)
+            await self._stop_process(process)
             return {
                 "return_code": -1,
                 "stdout": "",
                 "stderr": f"Command timed out after {timeout} seconds",
                 "success": False
             }
+        except asyncio.CancelledError:
+            logger.warning("Command cancelled", command=" ".join(cmd))
+            if process is not None:
+                await self._stop_process(process)
+            raise
         except Exception as e:
             logger.error("Command execution failed", command=" ".join(cmd), error=str(e))
             return {
@@ -165,11 +204,62 @@ class BorgmaticInterface:
         cmd = [self.borgmatic_cmd, "list", "--repository", self._sanitize_arg(repository), "--json"]
         return await self._execute_command(cmd)
     
+    async def has_any_archive(self, repository: str) -> Dict:
+        """Check whether a repository holds at least one archive, without listing them all"""
+        # Repository paths are absolute or ssh:// URLs, which _validate_path rejects;
+        # the commands run without a shell, so sanitizing the arguments is enough
+        repository = self._sanitize_arg(repository)
+        
+        # Prefer borgmatic, so the passphrase and ssh settings in its config apply
+        result = None
+        if self.config_path and os.path.exists(self.config_path):
+            cmd = [self.borgmatic_cmd, "list", "--repository", repository, "--last", "1", "--json",
+                   "--config", self._sanitize_arg(self.config_path)]
+            result = await self._execute_command(cmd)
+            if result["success"]:
+                try:
+                    listing = json.loads(result["stdout"])
+                    result["has_archives"] = any(entry.get("archives") for entry in listing)
+                    return result
+                except (ValueError, TypeError, AttributeError) as e:
+                    # A listing we can't read is not proof the repository is empty
+                    result["success"] = False
+                    result["stderr"] = f"Unexpected borgmatic list output: {str(e)}"
+                    result["has_archives"] = False
+                    return result
+        
+        # Repositories created through the UI are initialized with borg directly and
+        # aren't in the borgmatic config, which borgmatic rejects; ask borg instead
+        if result is None or "not found in" in result["stderr"].lower():
+            env = os.environ.copy()
+            # Fail instead of waiting on a passphrase prompt nobody can answer
+            env.setdefault("BORG_PASSPHRASE", "")
+            result = await self._execute_command(["borg", "list", "--short", "--last", "1", repository], env=env)
+            result["has_archives"] = result["success"] and bool(result["stdout"].strip())
+        else:
+            result["has_archives"] = False
+        
+        # A repository that is gone (removed, or its init failed) holds no archives
+        if not result["success"] and "does not exist" in result["stderr"].lower():
+            result["success"] = True
+            result["has_archives"] = False
+        return result
+    
     async def info_archive(self, repository: str, archive: str) -> Dict:
         """Get information about a specific archive"""
         cmd = [self.borgmatic_cmd, "info", "--repository", repository, "--archive", archive, "--json"]
         return await self._execute_command(cmd)
     
+    async def info_archives(self, repository: str, archives: List[str], concurrency: int = 4) -> List[Dict]:
+        """Get information about several archives with bounded concurrency"""
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def info(archive: str) -> Dict:
+            async with semaphore:
+                return await self.info_archive(repository, archive)
+        
+        return await asyncio.gather(*(info(archive) for archive in archives))
+    
     async def list_archive_contents(self, repository: str, archive: str, path: str = "") -> Dict:
         """List contents of an archive"""
         cmd = [self.borgmatic_cmd, "list", "--repository", repository, "--archive", archive, "--json"]
@@ -177,6 +267,55 @@ class BorgmaticInterface:
             cmd.extend(["--path", path])
         return await self._execute_command(cmd)
     
+    async def stream_archive_contents(self, repository: str, archive: str, path: str = "",
+                                      offset: int = 0, limit: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Stream archive contents line by line, skipping offset lines and stopping after limit.
+        
+        Raises RuntimeError with borgmatic's stderr if the listing exits non-zero.
+        """
+        cmd = [self.borgmatic_cmd, "list", "--repository", repository, "--archive", archive]
+        if path:
+            cmd.extend(["--path", path])
+        
+        logger.info("Streaming command", command=" ".join(cmd))
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True
+        )
+        # Drain stderr alongside stdout so a chatty borg can't fill the pipe and stall
+        stderr_task = asyncio.ensure_future(process.stderr.read())
+        
+        try:
+            index = 0
+            sent = 0
+            while limit is None or sent < limit:
+                line = await process.stdout.readline()
+                if not line:
+                    break
+                if index >= offset:
+                    yield line
+                    sent += 1
+                index += 1
+            else:
+                # Limit reached: the rest of the listing isn't needed
+                return
+            
+            await process.wait()
+            stderr = await stderr_task
+            if process.returncode != 0:
+                raise RuntimeError(stderr.decode(errors="replace").strip() or f"borgmatic exited with code {process.returncode}")
+        finally:
+            # Stop borgmatic and its borg child early if the client disconnected or the limit was reached
+            if process.returncode is None:
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+            await process.wait()
+            stderr_task.cancel()
+    
     async def extract_archive(self, repository: str, archive: str, paths: List[str], 
                             destination: str, dry_run: bool = False) -> Dict:
         """Extract files from an archive"""
@@ -192,6 +331,53 @@ class BorgmaticInterface:
         
         return await self._execute_command(cmd, timeout=settings.backup_timeout)
     
+    async def extract_archive_parallel(self, repository: str, archive: str, paths: List[str],
+                                       destination: str, dry_run: bool = False, concurrency: int = 4) -> Dict:
+        """Extract paths from an archive as several concurrent extracts, merging their results"""
+        # No paths means the whole archive, which can't be split up
+        if len(paths) <= 1 or concurrency <= 1:
+            return await self.extract_archive(repository, archive, paths, destination, dry_run=dry_run)
+        
+        shards = self._shard_extract_paths(paths, concurrency)
+        if len(shards) <= 1:
+            return await self.extract_archive(repository, archive, shards[0] if shards else paths,
+                                              destination, dry_run=dry_run)
+        
+        # borg extract only takes a shared repository lock, so the shards don't block each other
+        results = await asyncio.gather(*(
+            self.extract_archive(repository, archive, shard, destination, dry_run=dry_run)
+            for shard in shards
+        ))
+        
+        failed = [result for result in results if not result["success"]]
+        return {
+            "return_code": failed[0]["return_code"] if failed else 0,
+            "stdout": "".join(result["stdout"] for result in results),
+            "stderr": "".join(result["stderr"] for result in results),
+            "success": not failed
+        }
+    
+    @staticmethod
+    def _shard_extract_paths(paths: List[str], concurrency: int) -> List[List[str]]:
+        """Split extract paths into non-overlapping shards, one top-level subtree per shard"""
+        # Sorting puts every path right before its descendants; drop paths an ancestor already covers
+        kept = set()
+        for path in sorted({os.path.normpath(path) for path in paths}):
+            parts = path.split("/")
+            if any(("/".join(parts[:i]) or "/") in kept for i in range(1, len(parts))):
+                continue
+            kept.add(path)
+        
+        groups: Dict[str, List[str]] = {}
+        for path in sorted(kept):
+            groups.setdefault(path.lstrip("/").split("/", 1)[0], []).append(path)
+        
+        # Largest subtrees first, each into the currently smallest shard
+        shards: List[List[str]] = [[] for _ in range(min(concurrency, len(groups)))]
+        for group in sorted(groups.values(), key=len, reverse=True):
+            min(shards, key=len).extend(group)
+        return shards
+    
     async def delete_archive(self, repository: str, archive: str) -> Dict:
         """Delete an archive"""
         cmd = [self.borgmatic_cmd, "delete", "--repository", repository, "--archive", archive]
@@ -223,20 +409,35 @@ class BorgmaticInterface:
     async def get_config_info(self, config_file: str = None) -> Dict:
         """Get configuration information"""
         config_path = config_file or self.config_path
-        if not config_path or not os.path.exists(config_path):
+        try:
+            st = os.stat(config_path) if config_path else None
+        except OSError:
+            st = None
+        if st is None:
             return {
                 "success": False,
                 "error": "Configuration file not found",
                 "config_path": config_path
             }
         
+        file_version = (st.st_mtime_ns, st.st_size)
+        cached = self._config_cache.get(config_path)
+        if cached and cached[0] == file_version:
+            return {
+                "success": True,
+                "config": cached[1],
+                "content": cached[2],
+                "config_path": config_path
+            }
+        
         try:
-            with open(config_path, 'r') as f:
-                config_content = yaml.safe_load(f)
+            config_content, config_dump = await asyncio.to_thread(self._load_config_file, config_path)
+            self._config_cache[config_path] = (file_version, config_content, config_dump)
             
             return {
                 "success": True,
                 "config": config_content,
+                "content": config_dump,
                 "config_path": config_path
             }
         except Exception as e:
@@ -247,16 +448,32 @@ class BorgmaticInterface:
                 "config_path": config_path
             }
     
+    def invalidate_config_cache(self, config_path: str = None):
+        """Drop the cached parse of a configuration file (or all of them)"""
+        if config_path:
+            self._config_cache.pop(config_path, None)
+        else:
+            self._config_cache.clear()
+    
+    def _write_temp_config(self, config_content: str) -> str:
+        """Write configuration content to a temporary file and return its path"""
+        import tempfile
+        
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False) as temp_file:
+            temp_file.write(config_content)
+            return temp_file.name
+    
+    def _load_config_file(self, config_path: str) -> Tuple[Dict, str]:
+        """Read and parse a YAML configuration file, returning it with its normalized dump"""
+        with open(config_path, 'r') as f:
+            config = yaml.load(f, Loader=YamlSafeLoader)
+        return config, yaml.dump(config, Dumper=YamlSafeDumper, default_flow_style=False)
+    
     async def validate_config(self, config_content: str) -> Dict:
         """Validate configuration content using borgmatic config validate"""
         try:
             # Create a temporary config file for validation
-            import tempfile
-            import os
-            
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False) as temp_file:
-                temp_file.write(config_content)
-                temp_file_path = temp_file.name
+            temp_file_path = await asyncio.to_thread(self._write_temp_config, config_content)
             
             try:
                 # Use borgmatic config validate command
@@ -312,7 +529,7 @@ class BorgmaticInterface:
                 if is_valid:
                     return {
                         "success": True, 
-                        "config": yaml.safe_load(config_content),
+                        "config": yaml.load(config_content, Loader=YamlSafeLoader),
                         "warnings": warnings,
                         "errors": errors
                     }
@@ -382,7 +599,7 @@ class BorgmaticInterface:
                 last_backup = None
                 if archives:
                     latest_archive = max(archives, key=lambda x: x.get("time", 0))
-                    last_backup = datetime.fromtimestamp(latest_archive["time"]).strftime("%Y-%m-%d %H:%M:%S")
+                    last_backup = datetime.fromtimestamp(latest_archive["time"]).isoformat(sep=" ", timespec="seconds")
                 
                 # Check disk usage
                 disk_usage = 0
@@ -473,12 +690,16 @@ class BorgmaticInterface:
             logger.error("Failed to get repository status", error=str(e))
             return {"success": False, "error": str(e)}
     
-    def get_version(self) -> str:
+    async def get_version(self) -> str:
         """Get Borgmatic version"""
+        if self._version is not None:
+            return self._version
+        
         try:
-            result = subprocess.run([self.borgmatic_cmd, "--version"], capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                return result.stdout.strip()
+            result = await self._execute_command([self.borgmatic_cmd, "--version"], timeout=10)
+            if result["success"]:
+                self._version = result["stdout"].strip()
+                return self._version
             else:
                 return "Unknown"
         except Exception as e:
@@ -507,5 +728,67 @@ class BorgmaticInterface:
             logger.error("Failed to get system info", error=str(e))
             return {"success": False, "error": str(e)}
 
+class BorgmaticCache:
+    """Short-lived cache of borgmatic results shared across handlers"""
+    
+    def __init__(self, interface: BorgmaticInterface, ttl: float = 10.0):
+        self.interface = interface
+        self.ttl = ttl
+        self._results: Dict[str, Tuple[float, Dict]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._generation = 0
+    
+    async def get(self, key: str, fetch: Callable[[], Awaitable[Dict]]) -> Dict:
+        """Return a fresh cached result, or share a single in-flight fetch among callers"""
+        cached = self._results.get(key)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, fetch, self._generation))
+            self._inflight[key] = task
+        # Shield so one cancelled caller doesn't cancel the fetch for everyone else
+        return await asyncio.shield(task)
+    
+    async def _fetch(self, key: str, fetch: Callable[[], Awaitable[Dict]], generation: int) -> Dict:
+        """Run a fetch and record its result unless the cache was invalidated meanwhile"""
+        try:
+            result = await fetch()
+            # Don't store results that were invalidated while being fetched
+            if generation == self._generation:
+                self._results[key] = (time.monotonic(), result)
+            return result
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+    
+    async def repository_status(self) -> Dict:
+        """Get repository status, reusing a result younger than the TTL"""
+        return await self.get("repository_status", self.interface.get_repository_status)
+    
+    async def system_info(self) -> Dict:
+        """Get borgmatic system information, reusing a result younger than the TTL"""
+        return await self.get("system_info", self.interface.get_system_info)
+    
+    async def repository_info(self, repository_path: str) -> Dict:
+        """Get repository details, reusing a result younger than the TTL"""
+        return await self.get(
+            f"repository_info:{repository_path}",
+            lambda: self.interface.get_repository_info(repository_path)
+        )
+    
+    def invalidate(self, key: Optional[str] = None):
+        """Drop all cached results, or just the one under `key`"""
+        # Bumping the generation also keeps any in-flight fetch from storing a stale result
+        self._generation += 1
+        if key is None:
+            self._results.clear()
+            self._inflight.clear()
+        else:
+            self._results.pop(key, None)
+            self._inflight.pop(key, None)
+
 # Global instance
-borgmatic = BorgmaticInterface() 
\ No newline at end of file
+borgmatic = BorgmaticInterface()
+borgmatic_cache = BorgmaticCache(borgmatic) 
\ No newline at end of file
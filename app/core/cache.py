@@ -0,0 +1,24 @@
+from typing import Any, Callable, Optional
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from starlette.requests import Request
+from starlette.responses import Response
+
+# How long polled status responses are served from the cache (seconds)
+STATUS_CACHE_TTL = 5
+
+def init_response_cache():
+    """Initialize the in-process response cache"""
+    FastAPICache.init(InMemoryBackend(), prefix="borg-ui")
+
+def global_key_builder(
+    func: Callable[..., Any],
+    namespace: str = "",
+    request: Optional[Request] = None,
+    response: Optional[Response] = None,
+    args: Optional[tuple] = None,
+    kwargs: Optional[dict] = None,
+) -> str:
+    """Build a cache key shared by all users, for responses that don't depend on who asks"""
+    # Deliberately ignores kwargs: they carry current_user and the DB session
+    return f"{FastAPICache.get_prefix()}:{namespace}:{func.__module__}:{func.__name__}"
@@ -0,0 +1,16 @@
+import time
+from datetime import datetime
+from typing import Tuple
+
+# (epoch second, ISO string) of the last formatted timestamp; swapped as a whole
+_now_iso_cache: Tuple[int, str] = (0, "")
+
+def now_iso() -> str:
+    """Current UTC time as an ISO string, formatted at most once per second"""
+    global _now_iso_cache
+    second = int(time.time())
+    cached_second, cached_iso = _now_iso_cache
+    if second != cached_second:
+        cached_iso = datetime.utcfromtimestamp(second).isoformat()
+        _now_iso_cache = (second, cached_iso)
+    return cached_iso
@@ -0,0 +1,37 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from cron_descriptor import get_description
+
+# Prefer the Rust implementation of croniter when it is installed; both expose
+# the same croniter(expr, start_time).get_next(ret_type) API
+try:
+    from croniter_rs import croniter
+except ImportError:
+    from croniter import croniter
+
+@lru_cache(maxsize=512)
+def validate_cron(cron_expr: str) -> None:
+    """Raise if a cron expression doesn't parse; valid expressions are remembered"""
+    croniter(cron_expr)
+
+@lru_cache(maxsize=512)
+def describe_cron(cron_expr: str) -> str:
+    """Human readable description of a cron expression"""
+    return get_description(cron_expr)
+
+def next_n(cron_expr: str, n: int, base: Optional[datetime] = None) -> List[str]:
+    """ISO strings of the next `n` run times of a cron expression after `base` (default now)"""
+    base = base or datetime.now()
+    # Five-field expressions only resolve to whole minutes, so every base within
+    # the same minute yields the same runs and can share a cached result
+    if len(cron_expr.split()) == 5:
+        base = base.replace(second=0, microsecond=0)
+    return list(_next_n(cron_expr, base, n))
+
+@lru_cache(maxsize=1024)
+def _next_n(cron_expr: str, base: datetime, n: int) -> Tuple[str, ...]:
+    """Memoized body of next_n (a tuple, so cached results can't be mutated)"""
+    cron = croniter(cron_expr, base)
+    return tuple(cron.get_next(datetime).isoformat() for _ in range(n))
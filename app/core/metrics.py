@@ -0,0 +1,108 @@
+import asyncio
+import time
+import psutil
+import structlog
+from typing import Any, Dict, Optional
+
+logger = structlog.get_logger()
+
+# How often the background sampler refreshes system metrics (seconds)
+SAMPLE_INTERVAL = 2.0
+
+# Network reachability probe target and cadence
+NETWORK_PROBE_HOST = "8.8.8.8"
+NETWORK_PROBE_PORT = 53
+NETWORK_PROBE_INTERVAL = 30.0
+NETWORK_PROBE_TIMEOUT = 2.0
+
+# Latest system metrics, refreshed by metrics_sampler()
+_metrics_cache: Dict[str, Any] = {"network_status": "unknown"}
+
+# Boot time can't change without a restart, so read it once
+_BOOT_TIME = psutil.boot_time()
+
+# Candidate temperature sources, in order of preference
+TEMPERATURE_PATHS = [
+    "/sys/class/thermal/thermal_zone0/temp",
+    "/sys/class/hwmon/hwmon0/temp1_input",
+    "/proc/acpi/thermal_zone/THM0/temperature"
+]
+
+def _read_temperature(path: str) -> Optional[float]:
+    """Read a millidegree temperature file, returning degrees Celsius"""
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read().strip()
+    except OSError:
+        return None
+    return float(raw) / 1000.0 if raw.isdigit() else None
+
+# The temperature source doesn't change while running, so resolve it once
+_TEMP_PATH = next((path for path in TEMPERATURE_PATHS if _read_temperature(path) is not None), None)
+
+# Establish the baseline so non-blocking cpu_percent() calls return a real delta
+psutil.cpu_percent(interval=None)
+
+def _sample_metrics() -> Dict[str, Any]:
+    """Read system resource metrics from psutil"""
+    memory = psutil.virtual_memory()
+    disk = psutil.disk_usage('/')
+    network = psutil.net_io_counters()
+
+    return {
+        "cpu_usage": psutil.cpu_percent(interval=None),
+        "memory_usage": memory.percent,
+        "memory_total": memory.total,
+        "memory_available": memory.available,
+        "disk_usage": disk.percent,
+        "disk_total": disk.total,
+        "disk_free": disk.free,
+        "network_io": {
+            "bytes_sent": network.bytes_sent,
+            "bytes_recv": network.bytes_recv,
+            "packets_sent": network.packets_sent,
+            "packets_recv": network.packets_recv
+        },
+        "load_average": list(psutil.getloadavg()),
+        "boot_time": _BOOT_TIME,
+        "temperature": _read_temperature(_TEMP_PATH) if _TEMP_PATH else None
+    }
+
+async def refresh_metrics():
+    """Sample system metrics in a worker thread and update the cache"""
+    _metrics_cache.update(await asyncio.to_thread(_sample_metrics))
+
+async def probe_network() -> str:
+    """Check outbound connectivity with a non-blocking TCP connect"""
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(NETWORK_PROBE_HOST, NETWORK_PROBE_PORT),
+            timeout=NETWORK_PROBE_TIMEOUT
+        )
+        writer.close()
+        await writer.wait_closed()
+        return "connected"
+    except (OSError, asyncio.TimeoutError):
+        return "disconnected"
+
+async def metrics_sampler():
+    """Periodically refresh the system metrics cache"""
+    last_probe = None
+    while True:
+        try:
+            await refresh_metrics()
+            
+            now = time.monotonic()
+            if last_probe is None or now - last_probe >= NETWORK_PROBE_INTERVAL:
+                last_probe = now
+                _metrics_cache["network_status"] = await probe_network()
+        except Exception as e:
+            logger.error("Error sampling system metrics", error=str(e))
+        await asyncio.sleep(SAMPLE_INTERVAL)
+
+def get_metrics() -> Dict[str, Any]:
+    """Get the latest cached system metrics"""
+    if "cpu_usage" not in _metrics_cache:
+        # Sampler hasn't run yet (e.g. startup not complete); sample once inline
+        _metrics_cache.update(_sample_metrics())
+    return _metrics_cache
@@ -1,10 +1,14 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Set, Tuple
+import asyncio
+import hashlib
+import threading
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 import structlog
 
 from app.config import settings
@@ -19,6 +23,14 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # JWT token security
 security = HTTPBearer()
 
+# Authenticated users cached by token hash so repeat requests skip the JWT
+# verification and the User SELECT. Entries never outlive the token itself.
+USER_CACHE_TTL = 60
+USER_CACHE_MAXSIZE = 10000
+_user_cache: Dict[str, Tuple[float, User]] = {}
+_user_cache_tokens: Dict[int, Set[str]] = {}
+_user_cache_lock = threading.Lock()
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -27,6 +39,16 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+# bcrypt is deliberately slow (tens to hundreds of ms), so async handlers hash
+# and verify in a worker thread rather than stalling the event loop
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash without blocking the event loop"""
+    return await asyncio.to_thread(verify_password, plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password without blocking the event loop"""
+    return await asyncio.to_thread(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -39,46 +61,96 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-def verify_token(token: str) -> Optional[str]:
-    """Verify and decode a JWT token"""
+def decode_token(token: str) -> Optional[dict]:
+    """Verify a JWT token and return its claims"""
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-        return username
     except JWTError:
         return None
+    if payload.get("sub") is None:
+        return None
+    return payload
+
+def verify_token(token: str) -> Optional[str]:
+    """Verify and decode a JWT token"""
+    payload = decode_token(token)
+    return payload["sub"] if payload else None
+
+def _drop_cached_token(token_hash: str):
+    """Remove a cache entry and its token from the per-user index (lock must be held)"""
+    _, user = _user_cache.pop(token_hash)
+    tokens = _user_cache_tokens.get(user.id)
+    if tokens is not None:
+        tokens.discard(token_hash)
+        if not tokens:
+            del _user_cache_tokens[user.id]
+
+def _get_cached_user(token_hash: str) -> Optional[User]:
+    """Return the cached user snapshot for a token, if still fresh"""
+    with _user_cache_lock:
+        entry = _user_cache.get(token_hash)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            _drop_cached_token(token_hash)
+            return None
+        return entry[1]
 
-async def get_current_user(
+def _cache_user(token_hash: str, user: User, token_expires: float):
+    """Cache a detached snapshot of the user for the given token"""
+    snapshot = User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+    make_transient_to_detached(snapshot)
+    expires_at = min(time.time() + USER_CACHE_TTL, token_expires)
+    
+    with _user_cache_lock:
+        if token_hash in _user_cache:
+            _drop_cached_token(token_hash)
+        elif len(_user_cache) >= USER_CACHE_MAXSIZE:
+            # Evict the oldest entry (dicts keep insertion order)
+            _drop_cached_token(next(iter(_user_cache)))
+        _user_cache[token_hash] = (expires_at, snapshot)
+        _user_cache_tokens.setdefault(user.id, set()).add(token_hash)
+
+def invalidate_user_cache(user_id: int):
+    """Drop cached sessions for a user after their record changes"""
+    with _user_cache_lock:
+        for token_hash in _user_cache_tokens.pop(user_id, ()):
+            _user_cache.pop(token_hash, None)
+
+def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
-    """Get the current authenticated user"""
+    """Get the current authenticated user (sync so the DB lookup runs in the threadpool)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        username = verify_token(credentials.credentials)
-        if username is None:
+    token_hash = hashlib.sha256(credentials.credentials.encode()).hexdigest()
+    cached_user = _get_cached_user(token_hash)
+    if cached_user is not None:
+        # Attach a copy to this request's session without emitting a SELECT
+        user = db.merge(cached_user, load=False)
+    else:
+        payload = decode_token(credentials.credentials)
+        if payload is None:
             raise credentials_exception
         
-        user = db.query(User).filter(User.username == username).first()
+        user = db.query(User).filter(User.username == payload["sub"]).first()
         if user is None:
             raise credentials_exception
         
-        if not user.is_active:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Inactive user"
-            )
-        
-        return user
-    except JWTError:
-        raise credentials_exception
+        _cache_user(token_hash, user, payload.get("exp", 0))
+    
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+    
+    return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Get the current active user"""
@@ -95,7 +167,7 @@ async def get_current_admin_user(current_user: User = Depends(get_current_user))
         )
     return current_user
 
-async def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     """Authenticate a user with username and password"""
     user = db.query(User).filter(User.username == username).first()
     if not user:
@@ -181,10 +253,11 @@ def create_user(db: Session, username: str, password: str, email: str = None, is
 
 def update_user_password(db: Session, user_id: int, new_password: str) -> bool:
     """Update a user's password"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.get(User, user_id)
     if not user:
         return False
     
     user.password_hash = get_password_hash(new_password)
     db.commit()
+    invalidate_user_cache(user_id)
     return True 
\ No newline at end of file
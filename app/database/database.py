@@ -1,17 +1,45 @@
-from sqlalchemy import create_engine
+from sqlalchemy import MetaData, create_engine, inspect, literal, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import QueuePool, StaticPool
+import structlog
 from app.config import settings
 
-# Create database engine with connection pooling
+logger = structlog.get_logger()
+
+database_url = make_url(settings.database_url)
+
+# Create database engine with connection pooling.
+# Sync handlers run in FastAPI's threadpool, so pool_size should roughly match
+# the number of worker threads that can hold a session at once; overflow covers
+# bursts (SSE, long polling) and pool_timeout fails fast instead of stalling.
+# query_cache_size pins the compiled-statement cache (the handlers issue a small
+# set of fixed query shapes, so they compile once and are reused).
+pool_options = {
+    "poolclass": QueuePool,
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_max_overflow,
+    "pool_timeout": settings.db_pool_timeout,
+    "pool_recycle": settings.db_pool_recycle,
+    "pool_pre_ping": True
+}
+connect_args = {}
+
+if database_url.get_backend_name() == "sqlite":
+    # Pooled connections are handed to whichever thread checks them out
+    connect_args["check_same_thread"] = False
+    if database_url.database in (None, "", ":memory:"):
+        # Every connection to an in-memory database is a separate empty
+        # database, so share a single one
+        pool_options = {"poolclass": StaticPool}
+
 engine = create_engine(
-    settings.database_url,
-    poolclass=QueuePool,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,
-    echo=settings.debug
+    database_url,
+    connect_args=connect_args,
+    query_cache_size=1200,
+    echo=settings.debug,
+    **pool_options
 )
 
 # Create session factory
@@ -26,4 +54,36 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+def add_missing_columns(metadata: MetaData):
+    """Add columns that models gained since their table was created.
+    
+    create_all() only creates missing tables, so existing databases would
+    otherwise fail with "no such column" after an upgrade. Only nullable
+    columns are added; a constant default is applied to existing rows.
+    """
+    inspector = inspect(engine)
+    quote = engine.dialect.identifier_preparer.quote
+    existing_tables = set(inspector.get_table_names())
+    
+    with engine.begin() as connection:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns or not column.nullable:
+                    continue
+                
+                column_type = column.type.compile(dialect=engine.dialect)
+                ddl = f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"
+                if column.default is not None and column.default.is_scalar:
+                    default = literal(column.default.arg, column.type).compile(
+                        dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+                    )
+                    ddl += f" DEFAULT {default}"
+                
+                connection.execute(text(ddl))
+                logger.info("Added missing database column", table=table.name, column=column.name)
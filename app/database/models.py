@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Index
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from app.database.database import Base
 
@@ -65,8 +65,58 @@ class BackupJob(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     repository_id = Column(Integer, ForeignKey("repositories.id"))
+    repository = Column(String, nullable=True)  # Repository path or name the job ran against
     status = Column(String, default="pending")  # pending, running, completed, failed
+    progress = Column(Integer, default=0)
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
     error_message = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow) 
\ No newline at end of file
+    logs = deferred(Column(Text, nullable=True))  # Loaded only when explicitly requested
+    created_at = Column(DateTime, default=datetime.utcnow) 
+
+class RestoreJob(Base):
+    __tablename__ = "restore_jobs"
+    
+    id = Column(String, primary_key=True)  # Job id handed out to clients
+    repository = Column(String)
+    archive = Column(String)
+    dry_run = Column(Boolean, default=False)
+    status = Column(String, default="running")  # running, completed, failed
+    result = deferred(Column(Text, nullable=True))  # JSON extract result, once finished
+    error_message = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+class ScheduledJob(Base):
+    __tablename__ = "scheduled_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True)
+    cron_expression = Column(String)
+    repository = Column(String, nullable=True)
+    config_file = Column(String, nullable=True)
+    enabled = Column(Boolean, default=True)
+    last_run = Column(DateTime, nullable=True)
+    next_run = Column(DateTime, nullable=True)
+    description = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # The scheduler repeatedly looks up enabled jobs by next_run
+    __table_args__ = (
+        Index("ix_scheduled_enabled_nextrun", "enabled", "next_run"),
+    )
+
+class SystemSettings(Base):
+    __tablename__ = "system_settings"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    backup_timeout = Column(Integer, default=3600)
+    max_concurrent_backups = Column(Integer, default=2)
+    log_retention_days = Column(Integer, default=30)
+    email_notifications = Column(Boolean, default=False)
+    webhook_url = Column(String, default="")
+    auto_cleanup = Column(Boolean, default=True)
+    cleanup_retention_days = Column(Integer, default=90)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
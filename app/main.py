@@ -1,54 +1,121 @@
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
+import asyncio
 import structlog
+import logging
+import logging.handlers
+import orjson
 import os
+import queue
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
-from app.api import auth, dashboard, config, backup, archives, restore, schedule, logs, settings as settings_api, health, events, repositories, ssh_keys
-from app.database.database import engine
-from app.database.models import Base
-from app.core.security import create_first_user
+from app.config import settings
 
 # Load environment variables
 load_dotenv()
 
-# Configure structured logging
+def _orjson_dumps(obj, **kwargs) -> str:
+    """Serialize a log event with orjson (stdlib handlers expect str)"""
+    return orjson.dumps(obj, **kwargs).decode()
+
+# Configure structured logging before the app modules below log anything, so no
+# logger gets cached with the default configuration. Disabled levels are dropped
+# by the filtering wrapper before any processor runs.
 structlog.configure(
     processors=[
-        structlog.stdlib.filter_by_level,
         structlog.stdlib.add_logger_name,
-        structlog.stdlib.add_log_level,
-        structlog.stdlib.PositionalArgumentsFormatter(),
+        structlog.processors.add_log_level,
         structlog.processors.TimeStamper(fmt="iso"),
         structlog.processors.StackInfoRenderer(),
         structlog.processors.format_exc_info,
         structlog.processors.UnicodeDecoder(),
-        structlog.processors.JSONRenderer()
+        structlog.processors.JSONRenderer(serializer=_orjson_dumps)
     ],
     context_class=dict,
     logger_factory=structlog.stdlib.LoggerFactory(),
-    wrapper_class=structlog.stdlib.BoundLogger,
+    wrapper_class=structlog.make_filtering_bound_logger(logging.getLevelName(settings.log_level.upper())),
     cache_logger_on_first_use=True,
 )
 
+# Route stdlib logging through a queue so handler I/O happens on a background thread
+log_queue = queue.Queue(-1)
+log_handlers = [logging.StreamHandler()]
+if os.path.isdir(os.path.dirname(settings.log_file)):
+    log_handlers.append(
+        logging.handlers.RotatingFileHandler(settings.log_file, maxBytes=10 * 1024 * 1024, backupCount=5)
+    )
+log_listener = logging.handlers.QueueListener(log_queue, *log_handlers, respect_handler_level=True)
+root_logger = logging.getLogger()
+root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+root_logger.setLevel(settings.log_level.upper())
+log_listener.start()
+
+from app.api import auth, dashboard, config, backup, archives, restore, schedule, logs, settings as settings_api, health, events, repositories, ssh_keys
+from app.database.database import engine, add_missing_columns
+from app.database.models import Base
+from app.core.security import create_first_user
+from app.core.cache import init_response_cache
+from app.core.metrics import metrics_sampler, refresh_metrics
+from app.api.events import event_manager, monitor_backup_jobs, periodic_system_status
+from app.api.schedule import check_scheduled_jobs
+
 logger = structlog.get_logger()
 
-# Create database tables
+# Create database tables, and add columns that existing tables predate
 Base.metadata.create_all(bind=engine)
+add_missing_columns(Base.metadata)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize the application, run background tasks and cancel them on shutdown"""
+    logger.info("Starting Borgmatic Web UI")
+    
+    # Response cache for polled status endpoints
+    init_response_cache()
+    
+    # Create first user if no users exist
+    await create_first_user()
+    
+    # Prime the metrics cache, then start the event drainer, the job scheduler
+    # and the periodic workers
+    await refresh_metrics()
+    event_manager.start()
+    tasks = [
+        asyncio.create_task(metrics_sampler()),
+        asyncio.create_task(periodic_system_status()),
+        asyncio.create_task(monitor_backup_jobs()),
+        asyncio.create_task(check_scheduled_jobs())
+    ]
+    
+    logger.info("Borgmatic Web UI started successfully")
+    try:
+        yield
+    finally:
+        logger.info("Shutting down Borgmatic Web UI")
+        
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await event_manager.stop()
+        
+        # Flush queued log records
+        log_listener.stop()
 
 # Create FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="Borgmatic Web UI",
     description="A lightweight web interface for Borgmatic backup management",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
-from app.config import settings
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
@@ -76,20 +143,17 @@ app.include_router(events.router, prefix="/api/events", tags=["Events"])
 app.include_router(repositories.router, prefix="/api/repositories", tags=["Repositories"])
 app.include_router(ssh_keys.router, prefix="/api/ssh-keys", tags=["SSH Keys"])
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize application on startup"""
-    logger.info("Starting Borgmatic Web UI")
-    
-    # Create first user if no users exist
-    await create_first_user()
-    
-    logger.info("Borgmatic Web UI started successfully")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on application shutdown"""
-    logger.info("Shutting down Borgmatic Web UI")
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception):
+    """Log unexpected errors once and return a generic 500"""
+    logger.error(
+        "Unhandled exception",
+        method=request.method,
+        url=str(request.url),
+        error=str(exc),
+        exc_info=exc
+    )
+    return ORJSONResponse(status_code=500, content={"detail": "Internal server error"})
 
 @app.get("/", response_class=HTMLResponse)
 async def root():
@@ -306,9 +306,9 @@ const Logs: React.FC = () => {
             <h3 className="text-lg font-medium text-gray-900">
               {logTypes?.data?.log_types?.find((t: any) => t.id === selectedLogType)?.name || 'Logs'}
             </h3>
-            {logsData?.data?.total_lines && (
+            {logsData?.data?.returned_lines && (
               <span className="text-sm text-gray-500">
-                ({logsData.data.total_lines} total lines)
+                ({logsData.data.returned_lines} lines shown)
               </span>
             )}
           </div>